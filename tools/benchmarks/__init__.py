@@ -0,0 +1,3 @@
+"""
+Benchmarks for the tools. Run them from the tools folder, for example with "python -m benchmarks.parse_entry".
+"""
@@ -0,0 +1,61 @@
+"""
+Compares the startup of a tool needing all parsed entries: parsing everything, parsing with the parse cache and loading
+the catalog snapshot (including its freshness check) that maintenance.py writes. Works on a temporary folder with
+synthetic entries and checks that all give the same infos and that a changed entry makes the snapshot stale.
+
+Usage: python -m benchmarks.catalog_snapshot [number of entries]
+"""
+
+import sys
+import time
+import tempfile
+from utils.osg import *
+from benchmarks.synthetic import synthetic_entries
+
+
+def timed(function):
+    """
+    Duration and result of a call.
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+
+    number_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as temp_path:
+        games_path = os.path.join(temp_path, 'games')
+        os.mkdir(games_path)
+        for entry, content in synthetic_entries(number_entries):
+            write_text(os.path.join(games_path, entry), content)
+        cache_file = os.path.join(temp_path, 'parse_cache.pickle')
+        snapshot_file = os.path.join(temp_path, 'catalog_snapshot.pickle')
+
+        # like maintenance.py: parse and write the snapshot
+        parse_duration, infos = timed(lambda: assemble_infos(games_path))
+        CatalogSnapshot(infos, entry_stamps(games_path)).save(snapshot_file)
+        assemble_infos(games_path, cache_file)
+        cache_duration, cached_infos = timed(lambda: assemble_infos(games_path, cache_file))
+        catalog = Catalog(temp_path, cache_file, snapshot_file=snapshot_file)
+        snapshot_duration, _ = timed(catalog.load)
+
+        if cached_infos != infos or catalog.infos != infos:
+            raise RuntimeError('parsed, cached and snapshot infos differ')
+        if any(catalog.by_name(info['name']) is not info or catalog.by_file(info['file']) is not info for info in catalog.infos):
+            raise RuntimeError('snapshot indexes wrong')
+
+        # a changed entry makes it stale
+        entry = infos[0]['file']
+        entry_path = os.path.join(games_path, entry)
+        stat = os.stat(entry_path)
+        os.utime(entry_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        if CatalogSnapshot.load(snapshot_file).is_fresh(games_path):
+            raise RuntimeError('snapshot not stale after a change')
+
+    print('{} synthetic entries'.format(len(infos)))
+    print('          parse: {:.0f} ms'.format(parse_duration * 1000))
+    print('    parse cache: {:.0f} ms'.format(cache_duration * 1000))
+    print('       snapshot: {:.0f} ms'.format(snapshot_duration * 1000))
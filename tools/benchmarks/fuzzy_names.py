@@ -0,0 +1,84 @@
+"""
+Compares FuzzyNameIndex.lookup with comparing every name to every other name (like the synchronization scripts did)
+on synthetic game names, by default 10000 queries against 10000 names. The brute force is only run for a sample of
+the queries and extrapolated (all queries with 0 as number of samples, takes hours). Some queries are names with
+separators between every two characters, similar to the name without sharing any trigram with it. Raises an error if
+a sampled query gives another result than the brute force.
+
+Usage: python -m benchmarks.fuzzy_names [number of names] [number of queries] [threshold] [number of samples]
+"""
+
+import sys
+import time
+import random
+from utils.osg import *
+
+syllables = ('ka', 'ro', 'mi', 'dun', 'ge', 'on', 'tor', 'ix', 'al', 'be', 'ra', 'zon', 'qu', 'est', 'fi', 'ght',
+             'er', 'star', 'ship', 'war', 'craft', 'land', 'pix', 'el', 'ur', 'ban', 'ne', 'ox', 'ly', 'th')
+suffixes = ('', '', '', ' 2', ' 3', ' II', ' Remake', ' Online', ' Classic', ' Reloaded', ' 3D', ' Deluxe')
+
+
+def synthetic_word(rng):
+    return ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).capitalize()
+
+
+def synthetic_name(rng):
+    return ' '.join(synthetic_word(rng) for _ in range(rng.randint(1, 3))) + rng.choice(suffixes)
+
+
+def perturb(name, rng):
+    """
+    A typo, a changed case, a dropped suffix, like names of the same game in different lists, or separators between every
+    two characters.
+    """
+    choice = rng.randint(0, 3)
+    if choice == 0:
+        i = rng.randrange(len(name))
+        return name[:i] + rng.choice('aeiou') + name[i+1:]
+    if choice == 1:
+        return name.lower()
+    if choice == 2:
+        return name.rsplit(' ', 1)[0] if ' ' in name else name + 's'
+    return '-'.join(name[i:i+2] for i in range(0, len(name), 2))
+
+
+def brute_force(name, names, threshold):
+    matches = [(x, game_name_similarity(name, x)) for x in names]
+    matches = [x for x in matches if x[1] > threshold]
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+if __name__ == "__main__":
+
+    number_names = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    number_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 0.8
+    number_samples = int(sys.argv[4]) if len(sys.argv) > 4 else 200
+
+    rng = random.Random(0)
+    names = [synthetic_name(rng) for _ in range(number_names)]
+    queries = [perturb(rng.choice(names), rng) if rng.random() < 0.5 else synthetic_name(rng) for _ in range(number_queries)]
+    print('{} names, {} queries, threshold {}'.format(number_names, number_queries, threshold))
+
+    # index
+    start = time.perf_counter()
+    index = FuzzyNameIndex(names)
+    build_duration = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [index.lookup(query, threshold) for query in queries]
+    lookup_duration = time.perf_counter() - start
+    print('index: built in {:.2f} s, {} lookups in {:.2f} s'.format(build_duration, number_queries, lookup_duration))
+
+    # brute force on a sample
+    samples = rng.sample(range(number_queries), min(number_samples, number_queries)) if number_samples else range(number_queries)
+    start = time.perf_counter()
+    expected = {i: brute_force(queries[i], names, threshold) for i in samples}
+    brute_force_duration = (time.perf_counter() - start) / len(samples) * number_queries
+    print('brute force: {} lookups in {:.0f} s (extrapolated from {})'.format(number_queries, brute_force_duration, len(samples)))
+
+    # compare (ignoring the order of equally similar names)
+    same = sum(1 for i in samples if sorted(results[i]) == sorted(expected[i]))
+    print('same result for {} of {} sampled queries'.format(same, len(samples)))
+    if same != len(samples):
+        raise RuntimeError('index results differ from the brute force')
@@ -0,0 +1,36 @@
+"""
+Compares the memory used by the parsed entries of a synthetic catalog as plain dictionaries (with lists of strings)
+and as GameEntry objects (with tuples of interned strings).
+"""
+
+import sys
+import tracemalloc
+from utils import osg
+from benchmarks.synthetic import synthetic_entries
+
+
+def traced_size(parse, contents):
+    """
+    Parses all contents and returns the number of bytes allocated for the results.
+    """
+    tracemalloc.start()
+    infos = [parse(content) for content in contents]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del infos
+    return size
+
+
+if __name__ == "__main__":
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    contents = [content for _, content in synthetic_entries(number)]
+    print('{} synthetic entries'.format(number))
+
+    # the intern table is part of the cost of the new representation
+    osg.tag_intern_table.clear()
+
+    for name, parse in (('dict', osg.parse_entry_as_dict), ('GameEntry', osg.parse_entry)):
+        size = traced_size(parse, contents)
+        print('{:>10}: {:.1f} MB ({:.0f} bytes per entry)'.format(name, size / 1e6, size / number))
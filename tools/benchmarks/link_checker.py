@@ -0,0 +1,274 @@
+"""
+Checks the LinkChecker against a local http.server stand-in with slow, redirecting, failing and HEAD refusing
+endpoints (expected status, method, attempts and redirects for each), that at most per_host requests are in flight
+and that connections are reused, and compares the time for many slow links with checking them one after another with
+urllib like maintenance.py did before.
+
+Also checks the LinkCache: a second run takes everything from the cache, with expired working links only failed links
+are checked fully again and unchanged links are only confirmed (304). And that the permanent redirects found by
+check_validity_external_links are replaced in the entries of a temporary tree by rewrite_permanent_redirects
+(unless the entry would not parse anymore).
+
+Usage: python -m benchmarks.link_checker [number of slow links]
+"""
+
+import io
+import sys
+import json
+import time
+import tempfile
+import threading
+import urllib.request
+import urllib.error
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import maintenance
+from utils.osg import *
+from utils.link_checker import *
+
+# seconds the slow links of the timing comparison take
+delay = 0.2
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    The endpoints of the stand-in server, see expected_results.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    number_connections = 0
+    in_flight = 0
+    maximal_in_flight = 0
+    flaky_requests = 0
+    number_full_responses = 0
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            StandInHandler.number_connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status, headers=(), body=b''):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status == 200:
+            with self.lock:
+                StandInHandler.number_full_responses += 1
+        if self.command != 'HEAD':
+            try:
+                self.wfile.write(body)
+            except OSError:
+                # the client does not read large bodies
+                self.close_connection = True
+
+    def handle_request(self):
+        path = self.path.split('?')[0]
+        head = self.command == 'HEAD'
+        if path in ('/ok', '/'):
+            self.respond(200, body=b'ok')
+        elif path == '/delay':
+            time.sleep(delay)
+            self.respond(200, body=b'ok')
+        elif path == '/slow':
+            time.sleep(2)
+            self.respond(200, body=b'ok')
+        elif path == '/moved':
+            self.respond(301, (('Location', '/ok'),))
+        elif path == '/permanent':
+            self.respond(308, (('Location', 'http://{}:{}/moved'.format(*self.server.server_address)),))
+        elif path == '/gone':
+            self.respond(301, (('Location', '/'),))
+        elif path == '/found':
+            self.respond(302, (('Location', '/ok'),))
+        elif path == '/loop':
+            self.respond(302, (('Location', '/loop'),))
+        elif path == '/missing':
+            self.respond(404, body=b'not found')
+        elif path == '/nohead':
+            if head:
+                self.respond(405)
+            elif self.headers.get('Range') == 'bytes=0-0':
+                self.respond(206, (('Content-Range', 'bytes 0-0/1000'),), b'x')
+            else:
+                self.respond(200, body=b'x' * 1000)
+        elif path == '/big':
+            # ignores the range, sends a large body
+            if head:
+                self.respond(501)
+            else:
+                self.respond(200, body=b'x' * 1000000)
+        elif path == '/flaky':
+            with self.lock:
+                StandInHandler.flaky_requests += 1
+                # HEAD and GET of the first attempt fail
+                failing = StandInHandler.flaky_requests <= 2
+            self.respond(503 if failing else 200)
+        elif path == '/etag':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.respond(304, (('ETag', '"v1"'),))
+            else:
+                self.respond(200, (('ETag', '"v1"'),), b'ok')
+        elif path == '/modified':
+            modified = 'Mon, 05 Oct 2026 10:00:00 GMT'
+            if self.headers.get('If-Modified-Since') == modified:
+                self.respond(304)
+            else:
+                self.respond(200, (('Last-Modified', modified),), b'ok')
+        elif path == '/error':
+            self.respond(500)
+        elif path == '/close':
+            self.close_connection = True
+        else:
+            self.respond(400)
+
+    def handle_any(self):
+        # requests in flight of the slow links
+        counted = self.path.startswith('/delay')
+        if counted:
+            with self.lock:
+                StandInHandler.in_flight += 1
+                StandInHandler.maximal_in_flight = max(StandInHandler.maximal_in_flight, StandInHandler.in_flight)
+        try:
+            self.handle_request()
+        finally:
+            if counted:
+                with self.lock:
+                    StandInHandler.in_flight -= 1
+
+    do_HEAD = handle_any
+    do_GET = handle_any
+
+
+class StandInServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # connections closed by the client (timeouts, large bodies not read)
+        pass
+
+
+# path: (status, method, attempts, number of redirects, error expected) with retries=1
+expected_results = {
+    '/ok': (200, 'HEAD', 1, 0, False),
+    '/slow': (None, None, 2, 0, True),
+    '/moved': (200, 'HEAD', 1, 1, False),
+    '/permanent': (200, 'HEAD', 1, 2, False),
+    '/found': (200, 'HEAD', 1, 1, False),
+    '/loop': (None, None, 1, 0, True),
+    '/missing': (404, 'GET', 1, 0, False),
+    '/nohead': (206, 'GET', 1, 0, False),
+    '/big': (200, 'GET', 1, 0, False),
+    '/flaky': (200, 'HEAD', 2, 0, False),
+    '/error': (500, 'GET', 2, 0, False),
+    '/close': (None, None, 2, 0, True)}
+
+
+def legacy_check(url):
+    """
+    One link checked like maintenance.py did before (blocking, whole body).
+    """
+    try:
+        urllib.request.urlopen(urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; WOW64)'})).read()
+    except urllib.error.URLError:
+        pass
+
+
+if __name__ == "__main__":
+
+    number_slow = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = 'http://{}:{}'.format(*server.server_address)
+
+    # the endpoints
+    checker = LinkChecker(per_host=4, timeout=0.5, retries=1, backoff=0.05)
+    urls = [base + path for path in expected_results]
+    failed = 0
+    for path, result in zip(expected_results, checker.run(urls)):
+        got = (result['status'], result['method'], result['attempts'], len(result['redirects']), result['error'] is not None)
+        if got != expected_results[path]:
+            print('{}: expected {}, got {} ({})'.format(path, expected_results[path], got, result['error']))
+            failed += 1
+    print('{} endpoints, {} not as expected'.format(len(urls), failed))
+
+    # many slow links
+    urls = ['{}/delay?{}'.format(base, i) for i in range(number_slow)]
+    StandInHandler.number_connections = 0
+    StandInHandler.maximal_in_flight = 0
+    start = time.perf_counter()
+    results = checker.run(urls)
+    checker_duration = time.perf_counter() - start
+    if any(result['status'] != 200 for result in results):
+        raise RuntimeError('slow links not checked correctly')
+    print('{} slow links: {} requests on {} connections, at most {} in flight (limit {})'.format(
+        number_slow, checker.number_requests, StandInHandler.number_connections, StandInHandler.maximal_in_flight, checker.per_host))
+    if StandInHandler.maximal_in_flight > checker.per_host or StandInHandler.number_connections > checker.per_host:
+        failed += 1
+
+    start = time.perf_counter()
+    for url in urls:
+        legacy_check(url)
+    legacy_duration = time.perf_counter() - start
+    print('   checker: {:.2f} s'.format(checker_duration))
+    print('one by one: {:.2f} s'.format(legacy_duration))
+
+    # cache: first run, second run (all from the cache), with expired failures, with everything expired
+    urls = [base + path for path in ('/etag', '/modified', '/moved', '/missing', '/loop')]
+    numbers = []
+    with tempfile.TemporaryDirectory() as temp_path:
+        cache_file = os.path.join(temp_path, 'links_cache.jsonl')
+        checker = LinkChecker(timeout=0.5, retries=0)
+        for ttl, failure_ttl in ((3600, 3600), (3600, 3600), (3600, 0), (0, 0)):
+            cache = LinkCache(cache_file, ttl, failure_ttl)
+            StandInHandler.number_full_responses = 0
+            results = checker.run(urls, cache)
+            cache.save()
+            numbers.append((checker.number_requests, StandInHandler.number_full_responses, sum(1 for x in results if x['not modified'])))
+    for name, (requests, full_responses, not_modified) in zip(('first', 'cached', 'failures expired', 'all expired'), numbers):
+        print('{:>16}: {} requests, {} full responses, {} not modified'.format(name, requests, full_responses, not_modified))
+    # only the redirect target without validators is fully requested again
+    if numbers != [(12, 3, 0), (0, 0, 0), (8, 0, 0), (12, 1, 2)]:
+        failed += 1
+
+    # permanent redirects replaced (only as checked), temporary ones, moves to the root of a site and rewrites breaking
+    # an entry not
+    entry = '# {1}\n\n_Puzzle game._\n\n- Home: {2}\n- State: mature\n- Download: {3}\n- Keywords: puzzle\n' \
+            '- Code repository: https://github.com/x/{1}.git\n- Code language: C\n- Code license: MIT\n\n## Building\n'
+    entries = {'a.md': ('A', '{0}/moved, {0}/found', '{0}/permanent'),
+               'b.md': ('B', '{0}/moved/', '{0}/gone, {0}/missing'),
+               'c.md': ('C', '{0}/found', '{0}/missing')}
+    expected_entries = {'a.md': ('A', '{0}/ok, {0}/found', '{0}/ok'),
+                        'b.md': ('B', '{0}/moved/', '{0}/gone, {0}/missing'),
+                        'c.md': ('C', '{0}/found', '{0}/missing')}
+    # github repositories must end on .git
+    moved_repository = {'url': 'https://github.com/x/C.git', 'status': 200, 'error': None,
+                        'redirects': [[301, 'https://github.com/y/C']], 'entries': ['c.md']}
+    with tempfile.TemporaryDirectory() as root_path:
+        os.makedirs(os.path.join(root_path, 'games'))
+        os.makedirs(os.path.join(root_path, 'tools'))
+        for file, (name, home, download) in entries.items():
+            write_text(os.path.join(root_path, 'games', file), entry.format(base, name, home, download).format(base))
+        catalog = Catalog(root_path)
+        results_file = os.path.join(root_path, 'tools', 'links.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            maintenance.check_validity_external_links(catalog, LinkChecker(timeout=0.5, retries=0), results_file)
+            results = [x for x in json.loads(read_text(results_file)) if x['url'].startswith(base)]
+            maintenance.rewrite_permanent_redirects(catalog, results + [moved_repository])
+        for file, (name, home, download) in expected_entries.items():
+            got = read_text(os.path.join(root_path, 'games', file))
+            if got != entry.format(base, name, home, download).format(base):
+                print('{} after rewriting redirects: {}'.format(file, got))
+                failed += 1
+    print('permanent redirects rewritten')
+
+    server.shutdown()
+    if failed:
+        raise RuntimeError('link checker not as expected')
@@ -0,0 +1,72 @@
+"""
+Compares reading the entries in separate passes (check_template_leftovers, fix_entries, assemble_infos) with the single
+read pipeline process_entries of maintenance.py. Works on temporary copies of the games folder, reports the number of
+entry file reads and the wall time of both and checks that both give the same entries and infos.
+"""
+
+import time
+import tempfile
+import maintenance
+from utils import osg
+from utils.osg import *
+
+
+def copy_games(root_path, target_path):
+    """
+    Copies the games folder and the template into a target folder.
+    """
+    os.mkdir(os.path.join(target_path, 'games'))
+    copy_tree(os.path.join(root_path, 'games'), os.path.join(target_path, 'games'))
+    shutil.copyfile(os.path.join(root_path, 'template.md'), os.path.join(target_path, 'template.md'))
+
+
+def run(target_path, legacy):
+    """
+    Runs either the separate passes or the pipeline on a copy and returns the infos, number of reads and duration.
+    """
+    catalog = Catalog(target_path)
+
+    # count reads of entries (all go through read_text of utils.osg)
+    reads = [0]
+    read_text = osg.read_text
+
+    def counting_read_text(file):
+        reads[0] += 1
+        return read_text(file)
+
+    osg.read_text = counting_read_text
+    try:
+        start = time.perf_counter()
+        if legacy:
+            maintenance.check_template_leftovers(catalog)
+            maintenance.fix_entries(catalog)
+            catalog.parse()
+        else:
+            maintenance.process_entries(catalog)
+        infos = catalog.infos
+        duration = time.perf_counter() - start
+    finally:
+        osg.read_text = read_text
+    return infos, reads[0], duration
+
+
+if __name__ == "__main__":
+
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_path:
+        for legacy in (True, False):
+            target_path = os.path.join(temp_path, 'legacy' if legacy else 'pipeline')
+            os.mkdir(target_path)
+            copy_games(root_path, target_path)
+            results[legacy] = run(target_path, legacy)
+
+        # same entries and infos
+        entries = [{x: read_text(os.path.join(temp_path, y, 'games', x)) for x in entry_names(os.path.join(temp_path, y, 'games'))} for y in ('legacy', 'pipeline')]
+        if entries[0] != entries[1] or results[True][0] != results[False][0]:
+            raise RuntimeError('separate passes and pipeline differ')
+
+    for legacy, name in ((True, 'separate passes'), (False, 'pipeline')):
+        infos, reads, duration = results[legacy]
+        print('{:>15}: {} entries, {} entry reads, {:.0f} ms'.format(name, len(infos), reads, duration * 1000))
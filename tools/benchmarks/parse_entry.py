@@ -0,0 +1,187 @@
+"""
+Compares parse_entry (single pass line tokenizer) with how entries were parsed before (a separate regex for the name,
+the description and the field list and then once more per field over the whole entry text) on the entries of the games
+folder and on synthetic entries. Checks that both give the same infos.
+
+Usage: python -m benchmarks.parse_entry [number of synthetic entries]
+"""
+
+import sys
+import time
+from utils.osg import *
+from benchmarks.synthetic import synthetic_entries
+
+repetitions = 20
+
+
+def legacy_parse_entry(content):
+    """
+    Returns a dictionary of the features of the content, like parse_entry did before.
+    """
+
+    info = {}
+
+    # read name
+    regex = re.compile(r"^# (.*)") # start of content, starting with "# " and then everything until the end of line
+    matches = regex.findall(content)
+    if len(matches) != 1 or not matches[0]:
+        raise RuntimeError('Name not found in entry "{}"'.format(content))
+    info['name'] = matches[0]
+
+    # read description
+    regex = re.compile(r"^.*\n\n_(.*)_\n") # third line from top, everything between underscores
+    matches = regex.findall(content)
+    if len(matches) != 1 or not matches[0]:
+        raise RuntimeError('Description not found in entry "{}"'.format(content))
+    info['description'] = matches[0]
+
+    # first read all field names
+    regex = re.compile(r"^- (.*?): ", re.MULTILINE) # start of each line having "- ", then everything until a colon, then ": "
+    fields = regex.findall(content)
+
+    # check that essential fields are there
+    for field in essential_fields:
+        if field not in fields:
+            raise RuntimeError('Essential field "{}" missing in entry "{}"'.format(field, info['name']))
+
+    # check that all fields are valid fields and are existing in that order
+    index = 0
+    for field in fields:
+        while index < len(valid_fields) and field != valid_fields[index]:
+            index += 1
+        if index == len(valid_fields):
+            raise RuntimeError('Field "{}" in entry "{}" either misspelled or in wrong order'.format(field, info['name']))
+
+    # iterate over found fields
+    for field in fields:
+        regex = re.compile(r"- {}: (.*)".format(field))
+        matches = regex.findall(content)
+        if len(matches) != 1:
+            # every field should only be present once
+            raise RuntimeError('Field "{}" in entry "{}" exist multiple times.'.format(field, info['name']))
+        v = matches[0]
+
+        # first store as is
+        info[field.lower()+'-raw'] = v
+
+        # remove parenthesis with content
+        v = re.sub(r'\([^)]*\)', '', v)
+
+        # split on ','
+        v = v.split(',')
+
+        # strip
+        v = [x.strip() for x in v]
+
+        # remove all being false (empty) that were for example just comments
+        v = [x for x in v if x]
+
+        # if entry is of structure <..> remove <>
+        v = [x[1:-1] if x[0] == '<' and x[-1] == '>' else x for x in v]
+
+        # empty fields will not be stored
+        if not v:
+            continue
+
+        # store in info
+        info[field.lower()] = v
+
+    # check that essential fields made it through
+    for field in ('home', 'state', 'keywords', 'code language', 'code license'):
+        if field not in info:
+            raise RuntimeError('Essential field "{}" missing or empty in entry "{}"'.format(field, info['name']))
+
+    # now checks on the content of fields
+
+    # name should not have spaces at the begin or end
+    v = info['name']
+    if len(v) != len(v.strip()):
+        raise RuntimeError('No leading or trailing spaces in the entry name, "{}"'.format(info['name']))
+
+    # state (essential field) must contain either beta or mature but not both, but at least one
+    v = info['state']
+    for t in v:
+        if t != 'beta' and t != 'mature' and not t.startswith('inactive since '):
+            raise RuntimeError('Unknown state tage "{}" in entry "{}"'.format(t, info['name']))
+    if 'beta' in v != 'mature' in v:
+        raise RuntimeError('State must be one of <"beta", "mature"> in entry "{}"'.format(info['name']))
+
+    # extract inactive year
+    phrase = 'inactive since '
+    inactive_year = [x[len(phrase):] for x in v if x.startswith(phrase)]
+    assert len(inactive_year) <= 1
+    if inactive_year:
+        info['inactive'] = inactive_year[0]
+
+    # urls in home, download, play and code repositories must start with http or https (or git) and should not contain spaces
+    for field in ['home', 'download', 'play', 'code repository']:
+        if field in info:
+            for url in info[field]:
+                if not (url.startswith('http://') or url.startswith('https://') or url.startswith('git://') or url.startswith('svn://')):
+                    raise RuntimeError('URL "{}" in entry "{}" does not start with http'.format(url, info['name']))
+                if ' ' in url:
+                    raise RuntimeError('URL "{}" in entry "{}" contains a space'.format(url, info['name']))
+
+    # github repositories should end on .git
+    if 'code repository' in info:
+        for repo in info['code repository']:
+            if repo.startswith('https://github.com/') and not repo.endswith('.git'):
+                raise RuntimeError('Github repo {} in entry "{}" should end on .git.'.format(repo, info['name']))
+
+    # check that all platform tags are valid tags and are existing in that order
+    if 'platform' in info:
+        index = 0
+        for platform in info['platform']:
+            while index < len(valid_platforms) and platform != valid_platforms[index]:
+                index += 1
+            if index == len(valid_platforms):
+                raise RuntimeError('Platform tag "{}" in entry "{}" either misspelled or in wrong order'.format(platform, info['name']))
+
+    # there must be at least one keyword
+    if 'keywords' not in info:
+        raise RuntimeError('Need at least one keyword in entry "{}"'.format(info['name']))
+
+    # check for existence of at least one recommended keywords
+    fail = True
+    for recommended_keyword in recommended_keywords:
+        if recommended_keyword in info['keywords']:
+            fail = False
+            break
+    if fail:
+        raise RuntimeError('Entry "{}" contains no recommended keyword'.format(info['name']))
+
+    return info
+
+
+def timed(function, contents):
+    """
+    Average time of parsing all contents with a function (over some repetitions) and the infos.
+    """
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        infos = [function(content) for content in contents]
+    return (time.perf_counter() - start) / repetitions, infos
+
+
+if __name__ == "__main__":
+
+    number_synthetic = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    # paths
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+    games_path = os.path.join(root_path, 'games')
+
+    # read all entries once, we only want to time the parsing
+    corpora = {'games folder': [content for _, _, content in entry_iterator(games_path)],
+               'synthetic': [content for _, content in synthetic_entries(number_synthetic)]}
+
+    for corpus, contents in corpora.items():
+        legacy_duration, legacy_infos = timed(legacy_parse_entry, contents)
+        duration, infos = timed(parse_entry_as_dict, contents)
+        if legacy_infos != infos:
+            raise RuntimeError('infos of the {} entries differ'.format(corpus))
+
+        print('{} ({} entries)'.format(corpus, len(contents)))
+        print('     legacy: {:.1f} ms ({:.1f} us per entry)'.format(legacy_duration * 1000, legacy_duration / len(contents) * 1e6))
+        print('  tokenizer: {:.1f} ms ({:.1f} us per entry)'.format(duration * 1000, duration / len(contents) * 1e6))
+        print('    speedup: {:.1f}x'.format(legacy_duration / duration))
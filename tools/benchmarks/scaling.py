@@ -0,0 +1,140 @@
+"""
+Measures how the stages of the tools scale with the size of the catalog. For every size a repository like tree with
+that many synthetic entries is generated (see synthetic.py) in a temporary folder and parse_entry, assemble_infos,
+fix_entries, update_readme_and_tocs, update_statistics and export_json run on it one after another, each timed
+separately. The peak memory of every stage (memory allocated during the stage on top of what was allocated before) is
+measured in a second run on a fresh tree, because tracing the allocations slows the stages down.
+
+The results are stored as JSON together with the commit, so that the results of two commits can be compared with
+--compare.
+
+Usage: python -m benchmarks.scaling [--sizes 1000 10000 100000] [--output file] [--compare earlier results file]
+"""
+
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import datetime
+import tracemalloc
+import contextlib
+import maintenance
+from utils.osg import *
+from benchmarks.synthetic import write_synthetic_tree
+
+# results file format
+version = 1
+
+
+def stages():
+    """
+    The measured stages as (name, function of catalog and entry contents) in the order they run.
+    """
+    return (('parse_entry', lambda catalog, contents: [parse_entry(content) for content in contents]),
+            ('fix_entries', lambda catalog, contents: maintenance.fix_entries(catalog)),
+            ('assemble_infos', lambda catalog, contents: catalog.parse()),
+            ('update_readme_and_tocs', lambda catalog, contents: maintenance.update_readme_and_tocs(catalog)),
+            ('update_statistics', lambda catalog, contents: maintenance.update_statistics(catalog)),
+            ('export_json', lambda catalog, contents: maintenance.export_json(catalog)))
+
+
+def run_stages(root_path, trace):
+    """
+    Runs all stages on a tree and returns the wall time (seconds) or the peak memory (bytes, if tracing) of each.
+    """
+    catalog = Catalog(root_path)
+    contents = [content for _, _, content in entry_iterator(catalog.games_path)]
+    results = {}
+    for name, stage in stages():
+        # the progress output of the stages is not of interest here
+        with contextlib.redirect_stdout(io.StringIO()):
+            if trace:
+                tracemalloc.start()
+                before, _ = tracemalloc.get_traced_memory()
+                stage(catalog, contents)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[name] = peak - before
+            else:
+                start = time.perf_counter()
+                stage(catalog, contents)
+                results[name] = time.perf_counter() - start
+    return results
+
+
+def measure(size, source_root_path):
+    """
+    Wall time and peak memory of all stages for a catalog of that size, by stage name.
+    """
+    results = {}
+    for trace in (False, True):
+        with tempfile.TemporaryDirectory() as root_path:
+            write_synthetic_tree(root_path, size, source_root_path)
+            results[trace] = run_stages(root_path, trace)
+    return {name: {'seconds': round(results[False][name], 4), 'peak memory': results[True][name]} for name, _ in stages()}
+
+
+def commit_info(root_path):
+    """
+    The current commit and whether the working tree has changes (None if not in a git repository).
+    """
+    try:
+        commit = git_output(root_path, 'rev-parse', 'HEAD').strip()
+        dirty = bool(git_output(root_path, 'status', '--porcelain', '--', 'tools').strip())
+    except (RuntimeError, OSError):
+        return None, None
+    return commit, dirty
+
+
+def print_results(results, earlier=None):
+    """
+    Prints the results as table, with the ratios to earlier results (for the same sizes and stages) if given.
+    """
+    for size, measured in results['sizes'].items():
+        print('{} entries'.format(size))
+        for name, values in measured.items():
+            line = '  {:>24}: {:9.1f} ms {:9.1f} MB'.format(name, values['seconds'] * 1000, values['peak memory'] / 1e6)
+            old = earlier['sizes'].get(size, {}).get(name, None) if earlier else None
+            if old:
+                line += '  (time x{:.2f}, memory x{:.2f})'.format(values['seconds'] / max(old['seconds'], 1e-9),
+                                                                 values['peak memory'] / max(old['peak memory'], 1))
+            print(line)
+
+
+if __name__ == "__main__":
+
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+
+    parser = argparse.ArgumentParser(description='Scaling of the tools with synthetic catalogs of several sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=(1000, 10000, 100000), help='numbers of entries')
+    parser.add_argument('--output', help='results file (default benchmarks/results/scaling-COMMIT.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    commit, dirty = commit_info(root_path)
+    results = {'version': version, 'commit': commit, 'dirty': dirty,
+               'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+               'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(), 'sizes': {}}
+    for size in args.sizes:
+        print('measure {} entries'.format(size), file=sys.stderr)
+        results['sizes'][str(size)] = measure(size, root_path)
+
+    earlier = None
+    if args.compare:
+        earlier = json.loads(read_text(args.compare))
+        if earlier['version'] != version:
+            raise RuntimeError('Results {} have version {}, expected {}'.format(args.compare, earlier['version'], version))
+        print('compared to {} of commit {}'.format(args.compare, earlier['commit']))
+    print_results(results, earlier)
+
+    output = args.output
+    if not output:
+        results_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+        if not os.path.isdir(results_path):
+            os.mkdir(results_path)
+        output = os.path.join(results_path, 'scaling-{}.json'.format(commit[:7] if commit else 'unknown'))
+    write_text(output, json.dumps(results, indent=1))
+    print('results written to {}'.format(output))
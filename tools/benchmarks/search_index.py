@@ -0,0 +1,76 @@
+"""
+Checks that SearchIndex.search (the search of docs/index.html) returns the same rows as a naive substring search over
+the texts of all rows, for a corpus of queries taken from the entries (substrings of all lengths, several words, words
+not in any row), and compares the time of both.
+
+Usage: python -m benchmarks.search_index [number of queries]
+"""
+
+import sys
+import time
+import random
+import maintenance
+from utils.osg import *
+
+
+def naive_search(texts, query):
+    """
+    Rows containing all words of the query, going through all rows.
+    """
+    words = [x for x in query.lower().split(' ') if x]
+    return [row for row, text in enumerate(texts) if all(word in text for word in words)]
+
+
+def query_corpus(texts, number, rng):
+    """
+    Random queries: substrings of the texts of length 1 to 12, two of them as two words, and some random letters.
+    """
+    queries = []
+    for _ in range(number):
+        choice = rng.random()
+        text = rng.choice(texts)
+        length = rng.randint(1, 12)
+        start = rng.randrange(max(1, len(text) - length))
+        query = text[start:start+length].replace('\n', ' ')
+        if choice < 0.3:
+            other = rng.choice(texts)
+            query += ' ' + other[:rng.randint(1, 6)].replace('\n', ' ')
+        elif choice < 0.4:
+            query = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 6)))
+        if rng.random() < 0.3:
+            query = query.upper()
+        queries.append(query)
+    return queries
+
+
+if __name__ == "__main__":
+
+    number_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    # texts of the rows like in the export
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+    infos = assemble_infos(os.path.join(root_path, 'games'))
+    rows, vocabularies = maintenance.compact_rows(infos)
+    texts = [maintenance.search_text(row, vocabularies) for row in rows]
+
+    start = time.perf_counter()
+    index = SearchIndex.build(texts)
+    build_duration = time.perf_counter() - start
+
+    queries = query_corpus(index.texts, number_queries, random.Random(0))
+
+    start = time.perf_counter()
+    results = [index.search(query) for query in queries]
+    index_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [naive_search(index.texts, query) for query in queries]
+    naive_duration = time.perf_counter() - start
+
+    different = [query for query, a, b in zip(queries, results, expected) if a != b]
+    for query in different[:10]:
+        print('different result for "{}"'.format(query))
+    print('{} rows, index built in {:.0f} ms'.format(len(texts), build_duration * 1000))
+    print('{} queries: index {:.1f} ms, naive {:.1f} ms, {} with different results'.format(len(queries), index_duration * 1000, naive_duration * 1000, len(different)))
+    if different:
+        raise RuntimeError('search index and naive search differ')
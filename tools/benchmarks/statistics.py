@@ -0,0 +1,105 @@
+"""
+Compares the single pass StatisticsAggregation (and write_statistics) of maintenance.py with how update_statistics
+gathered the numbers before (a list of all values per field, turned into a set, then list.count for every distinct value
+and the page built by string concatenation) on synthetic entries. Checks that both give the same numbers.
+
+Usage: python -m benchmarks.statistics [number of entries]
+"""
+
+import gc
+import io
+import sys
+import time
+import maintenance
+from utils.osg import *
+from benchmarks.synthetic import synthetic_entries
+
+# at least that many repetitions and seconds of repetitions for every measurement
+repetitions = 5
+minimal_duration = 2
+
+
+def legacy_statistics(infos):
+    """
+    The numbers of the statistics page, gathered like update_statistics did before. Returns the frequencies of the
+    counted fields, the names of the lists and the page text (frequency tables only).
+    """
+    statistics = ''
+    frequencies = {}
+    for field in maintenance.StatisticsAggregation.counted_fields:
+        values = []
+        for info in infos:
+            if field in info:
+                values.extend(info[field])
+        unique_values = set(values)
+        unique_values = [(l, values.count(l) / len(values)) for l in unique_values]
+        unique_values.sort(key=lambda x: str.casefold(x[0])) # first sort by name
+        unique_values.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
+        frequencies[field] = {l: round(n * len(values)) for l, n in unique_values}
+        for l, n in unique_values:
+            statistics += '- {} ({:.1f}%)\n'.format(l, n * 100)
+
+    lists = {}
+    lists['inactive'] = sorted(x['name'] for x in infos if 'inactive' in x)
+    lists['no download'] = sorted(x['name'] for x in infos if 'download' not in x and 'play' not in x)
+    lists['unpopular repository'] = sorted(x['name'] for x in infos if 'code repository' in x and not any(p in r for r in x['code repository'] for p in maintenance.popular_code_repositories))
+    lists['c cpp without build system'] = sorted(x['name'] for x in infos if ('C' in x['code language'] or 'C++' in x['code language']) and 'build system' not in x)
+    lists['c cpp cmake'] = sorted(x['name'] for x in infos if 'build system' in x and 'CMake' in x['build system'] and ('C' in x['code language'] or 'C++' in x['code language']))
+    return frequencies, lists, statistics
+
+
+def aggregation_statistics(infos):
+    """
+    The aggregation and the page written by write_statistics.
+    """
+    aggregation = maintenance.StatisticsAggregation(infos)
+    out = io.StringIO()
+    maintenance.write_statistics(aggregation, out)
+    return aggregation, out.getvalue()
+
+
+def aggregation_numbers(aggregation):
+    """
+    The frequencies and lists of an aggregation like returned by legacy_statistics.
+    """
+    frequencies = {field: dict(counter) for field, counter in aggregation.counters.items()}
+    lists = {'inactive': sorted(name for names in aggregation.inactive_by_year.values() for name in names),
+             'no download': sorted(aggregation.entries_no_download),
+             'unpopular repository': sorted(aggregation.entries_unpopular_repository),
+             'c cpp without build system': sorted(aggregation.c_cpp_project_without_build_system),
+             'c cpp cmake': sorted(aggregation.c_cpp_project_cmake)}
+    return frequencies, lists
+
+
+def timed(function, infos):
+    """
+    Best time of some repetitions (at least repetitions and minimal_duration) and the result. The garbage collection is off while timing (like timeit does), it
+    would go over all entries at random moments and make the times unsteady.
+    """
+    durations = []
+    while len(durations) < repetitions or sum(durations) < minimal_duration:
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function(infos)
+            durations.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(durations), result
+
+
+if __name__ == "__main__":
+
+    number_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    infos = parse_entries(list(synthetic_entries(number_entries)))
+    print('{} synthetic entries'.format(len(infos)))
+
+    legacy_duration, legacy = timed(legacy_statistics, infos)
+    aggregation_duration, aggregation = timed(aggregation_statistics, infos)
+    if legacy[:2] != aggregation_numbers(aggregation[0]):
+        raise RuntimeError('numbers of the statistics differ')
+
+    print('        legacy: {:.0f} ms'.format(legacy_duration * 1000))
+    print('   aggregation: {:.0f} ms (whole page)'.format(aggregation_duration * 1000))
+    print('       speedup: {:.1f}x'.format(legacy_duration / aggregation_duration))
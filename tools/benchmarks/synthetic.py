@@ -0,0 +1,97 @@
+"""
+Generates synthetic entries following template.md and the valid fields, so that the tools can be measured with
+catalogs much larger than the real one.
+"""
+
+import random
+from utils.osg import *
+
+words = ('Ancient', 'Battle', 'Castle', 'Dungeon', 'Empire', 'Fleet', 'Galaxy', 'Hero', 'Island', 'Jungle', 'Knight',
+         'Legend', 'Maze', 'Night', 'Orbit', 'Pirate', 'Quest', 'Robot', 'Space', 'Tank', 'Underworld', 'Viking',
+         'Wizard', 'Xeno', 'Yeti', 'Zombie')
+languages = ('C', 'C++', 'C#', 'Java', 'Python', 'Lua', 'JavaScript', 'TypeScript', 'PHP', 'Rust', 'Go', 'Haxe',
+             'Pascal', 'Ruby', 'Kotlin', 'D', 'Ada', 'Scala')
+licenses = ('GPL-2.0', 'GPL-3.0', 'LGPL-2.1', 'LGPL-3.0', 'AGPL-3.0', 'MIT', 'Apache-2.0', 'BSD', 'zlib',
+            'MPL-2.0', 'Public domain', 'Custom')
+assets_licenses = ('CC-BY-SA-3.0', 'CC-BY-4.0', 'CC0', 'proprietary', 'GPL-2.0')
+dependencies = ('SDL', 'SDL2', 'SDL2_mixer', 'SDL2_image', 'OpenGL', 'OpenAL', 'Boost', 'Qt', 'SFML', 'Allegro',
+                'libGDX', 'Pygame', 'LWJGL', 'Ogre3D', 'Irrlicht', 'Bullet', 'Box2D', 'LÖVE', 'Godot', 'Unity',
+                'Phaser', 'three.js', 'GLFW', 'GLEW', 'zlib', 'libpng', 'FreeType', 'Lua', 'ncurses', 'wxWidgets')
+build_systems = ('CMake', 'Make', 'Autotools', 'SCons', 'Gradle', 'Maven', 'Ant', 'Meson', 'Premake', 'Cargo',
+                 'setup.py', 'Visual Studio')
+extra_keywords = ('multiplayer', 'singleplayer', 'multiplayer online', 'multiplayer LAN', 'open content',
+                  'commercial content', 'real time', 'turn-based', 'clone', 'similar', '2D', '3D', 'isometric',
+                  'roguelike', 'shooter', 'racing', 'sandbox', 'space', 'tactics', 'text-based') \
+                 + tuple('inspired by {} {}'.format(a, b) for a in words for b in words[:12])
+
+
+def sample_sorted(rng, population, maximum):
+    """
+    A random non-empty subset of the population keeping the order of the population.
+    """
+    indices = rng.sample(range(len(population)), rng.randint(1, maximum))
+    return [population[i] for i in sorted(indices)]
+
+
+def synthetic_entry(index, rng):
+    """
+    Returns file name and content of a synthetic entry that passes parse_entry.
+    """
+    name = '{} {} {}'.format(rng.choice(words), rng.choice(words), index)
+    slug = name.lower().replace(' ', '-')
+    text = '# {}\n\n_{} game about {} and {}._\n\n'.format(name, rng.choice(recommended_keywords).capitalize(), rng.choice(words).lower(), rng.choice(words).lower())
+
+    # fields in the valid order
+    text += '- Home: https://{}.example.org/\n'.format(slug)
+    if rng.random() < 0.3:
+        text += '- Media: https://en.wikipedia.org/wiki/{}\n'.format(name.replace(' ', '_'))
+    state = rng.choice(('beta', 'mature'))
+    if rng.random() < 0.45:
+        state += ', inactive since {}'.format(rng.randint(1995, 2019))
+    text += '- State: {}\n'.format(state)
+    if rng.random() < 0.1:
+        text += '- Play: https://{}.example.org/play/\n'.format(slug)
+    if rng.random() < 0.6:
+        text += '- Download: https://{}.example.org/download/\n'.format(slug)
+    if rng.random() < 0.4:
+        text += '- Platform: {}\n'.format(', '.join(sample_sorted(rng, valid_platforms, 4)))
+    keywords = [rng.choice(recommended_keywords)] + sorted(set(rng.sample(extra_keywords, rng.randint(1, 5))), key=str.casefold)
+    text += '- Keywords: {}\n'.format(', '.join(keywords))
+    text += '- Code repository: https://github.com/synthetic/{}.git\n'.format(slug)
+    text += '- Code language: {}\n'.format(', '.join(rng.sample(languages, rng.randint(1, 2))))
+    text += '- Code license: {}\n'.format(rng.choice(licenses))
+    if rng.random() < 0.7:
+        text += '- Code dependencies: {}\n'.format(', '.join(sorted(set(rng.sample(dependencies, rng.randint(1, 4))), key=str.casefold)))
+    if rng.random() < 0.3:
+        text += '- Assets license: {}\n'.format(rng.choice(assets_licenses))
+
+    # building section
+    text += '\n## Building\n'
+    if rng.random() < 0.4:
+        text += '\n- Build system: {}\n'.format(rng.choice(build_systems))
+
+    return derive_canonical_file_name(name), text
+
+
+def synthetic_entries(number, seed=0):
+    """
+    Yields file name and content of a number of synthetic entries, always the same for the same seed.
+    """
+    rng = random.Random(seed)
+    for index in range(number):
+        yield synthetic_entry(index, rng)
+
+
+def write_synthetic_tree(root_path, number, source_root_path, seed=0):
+    """
+    Creates a repository like tree with a number of synthetic entries in the games folder, the template and readme of
+    a source repository and empty docs and tools folders, so that the stages of maintenance.py can run on it.
+    """
+    games_path = os.path.join(root_path, 'games')
+    os.makedirs(games_path)
+    for folder in ('docs', 'tools'):
+        os.mkdir(os.path.join(root_path, folder))
+    for file in ('template.md', 'README.md'):
+        shutil.copyfile(os.path.join(source_root_path, file), os.path.join(root_path, file))
+    for entry, content in synthetic_entries(number, seed):
+        write_text(os.path.join(games_path, entry), content)
@@ -0,0 +1,164 @@
+"""
+Checks update.py against local bare repositories (file:// urls): all are cloned as mirrors, new commits are fetched
+by a second run, a broken url fails without stopping the others, and the limit of a host is never exceeded. Also
+checks run_tasks with sleeping tasks of several hosts (limits of each host and of the number of jobs) and compares the
+time of updating all repositories one after another with updating them in parallel.
+
+Usage: python -m benchmarks.update [number of repositories] [jobs]
+"""
+
+import io
+import sys
+import time
+import tempfile
+import threading
+import contextlib
+import update
+from utils.utils import *
+
+# environment of the git commands creating the source repositories
+git_environment = dict(os.environ, GIT_AUTHOR_NAME='test', GIT_AUTHOR_EMAIL='test@example.org',
+                       GIT_COMMITTER_NAME='test', GIT_COMMITTER_EMAIL='test@example.org')
+
+
+def git(path, *args):
+    """
+    Runs a git command in a folder (with a fixed author).
+    """
+    subprocess.run(['git', *args], cwd=path, env=git_environment, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def create_repositories(sources_path, number):
+    """
+    Creates that many bare repositories with one commit each and a working copy of each (to add commits) and returns
+    their file urls.
+    """
+    urls = []
+    for i in range(number):
+        bare_path = os.path.join(sources_path, 'repository{}.git'.format(i))
+        work_path = os.path.join(sources_path, 'work{}'.format(i))
+        git(sources_path, 'init', '--bare', '--quiet', bare_path)
+        git(sources_path, 'clone', '--quiet', bare_path, work_path)
+        add_commit(work_path, 'first')
+        urls.append('file://' + bare_path)
+    return urls
+
+
+def add_commit(work_path, message):
+    """
+    Adds a commit to a working copy and pushes it to its bare repository.
+    """
+    write_text(os.path.join(work_path, 'file.txt'), message)
+    git(work_path, 'add', 'file.txt')
+    git(work_path, 'commit', '--quiet', '-m', message)
+    git(work_path, 'push', '--quiet', 'origin', 'HEAD')
+
+
+def check_mirrors(sources_path, archive_folder, urls):
+    """
+    Number of mirrors whose references differ from their source.
+    """
+    different = 0
+    for url in urls:
+        mirror_path = os.path.join(archive_folder, 'git', update.git_folder_name(url))
+        source_path = url[len('file://'):]
+        if git_output(mirror_path, 'show-ref') != git_output(source_path, 'show-ref'):
+            different += 1
+    return different
+
+
+class Counter:
+    """
+    Counts how many calls of functions run at the same time (in total and by host).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.maximum = {}
+
+    def wrap(self, host, function):
+        def wrapped(*args):
+            with self.lock:
+                for key in (host, None):
+                    self.running[key] = self.running.get(key, 0) + 1
+                    self.maximum[key] = max(self.maximum.get(key, 0), self.running[key])
+            try:
+                function(*args)
+            finally:
+                with self.lock:
+                    for key in (host, None):
+                        self.running[key] -= 1
+        return wrapped
+
+
+def quiet(function):
+    """
+    Calls a function printing progress and returns its result (the output only if something failed).
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        return function(), output.getvalue()
+
+
+if __name__ == "__main__":
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    failed = 0
+
+    # sleeping tasks of several hosts
+    counter = Counter()
+    hosts = ('github.com', 'sourceforge.net', 'gitlab.com', 'example.org')
+    tasks = [(host, '{} {}'.format(host, i), counter.wrap(host, lambda: time.sleep(0.05))) for host in hosts for i in range(20)]
+    start = time.perf_counter()
+    errors, _ = quiet(lambda: update.run_tasks(tasks, jobs))
+    duration = time.perf_counter() - start
+    limits = {host: min(jobs, update.host_limits.get(host, update.default_host_limit)) for host in hosts}
+    print('{} tasks of {} hosts in {:.2f} s, at most {} at the same time (jobs {}), by host {} (limits {})'.format(
+        len(tasks), len(hosts), duration, counter.maximum[None], jobs, {host: counter.maximum[host] for host in hosts}, limits))
+    if errors or counter.maximum[None] > jobs or any(counter.maximum[host] > limits[host] for host in hosts):
+        failed += 1
+
+    # local repositories
+    with tempfile.TemporaryDirectory() as temp_path:
+        sources_path = os.path.join(temp_path, 'sources')
+        os.mkdir(sources_path)
+        urls = create_repositories(sources_path, number)
+        broken_url = 'file://' + os.path.join(sources_path, 'missing.git')
+
+        # the limit of local repositories lower than the jobs, clone and fetch counted
+        update.host_limits['local'] = max(1, jobs // 2)
+        counter = Counter()
+        update.clone['git'] = counter.wrap('local', update.git_clone)
+        update.update['git'] = counter.wrap('local', update.git_update)
+
+        durations = {}
+        for run_jobs in (1, jobs):
+            archive_folder = os.path.join(temp_path, 'archive{}'.format(run_jobs))
+            os.mkdir(archive_folder)
+            start = time.perf_counter()
+            errors, output = quiet(lambda: update.run_update('git', urls + [broken_url], archive_folder, run_jobs))
+            clone_duration = time.perf_counter() - start
+            if len(errors) != 1 or check_mirrors(sources_path, archive_folder, urls):
+                print(output)
+                failed += 1
+
+            # new commits in some sources
+            for i in range(0, number, 3):
+                add_commit(os.path.join(sources_path, 'work{}'.format(i)), 'second {}'.format(run_jobs))
+            start = time.perf_counter()
+            errors, output = quiet(lambda: update.run_update('git', urls, archive_folder, run_jobs))
+            durations[run_jobs] = (clone_duration, time.perf_counter() - start)
+            if errors or check_mirrors(sources_path, archive_folder, urls):
+                print(output)
+                failed += 1
+
+        print('{} local repositories, at most {} at the same time (limit {})'.format(number, counter.maximum['local'], update.host_limits['local']))
+        if counter.maximum['local'] > update.host_limits['local']:
+            failed += 1
+        for run_jobs, (clone_duration, update_duration) in durations.items():
+            print('{:>2} jobs: clone {:.2f} s, update {:.2f} s'.format(run_jobs, clone_duration, update_duration))
+
+    if failed:
+        raise RuntimeError('update not as expected')
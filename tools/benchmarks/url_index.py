@@ -0,0 +1,63 @@
+"""
+Checks extract_urls and canonical_url on examples and reports for the entries how many urls the former link check
+regex (only http://) found, how many urls there are in total and how many distinct canonical urls (checked once each)
+the UrlIndex has, and how long building the index takes.
+
+Usage: python -m benchmarks.url_index
+"""
+
+import time
+from utils.osg import *
+
+# text: urls extracted
+extract_examples = {
+    '- Media: <https://en.wikipedia.org/wiki/0_A.D._(video_game)>': ['https://en.wikipedia.org/wiki/0_A.D._(video_game)'],
+    '- Home: https://play2048.co/, https://en.wikipedia.org/wiki/2048_(video_game)': ['https://play2048.co/', 'https://en.wikipedia.org/wiki/2048_(video_game)'],
+    '- Code repository: git://git.x.org/y.git (@add), svn://svn.x.org/y/trunk': ['git://git.x.org/y.git', 'svn://svn.x.org/y/trunk'],
+    'see [the site](http://x.org/a). and ftp://x.org/b': ['http://x.org/a'],
+    'https://web.archive.org/web/2019/http://x.org/': ['https://web.archive.org/web/2019/http://x.org/']}
+
+# url: canonical url
+canonical_examples = {
+    'http://www.Example.org:80/a/': 'https://example.org/a',
+    'https://github.com/a/b.git': 'https://github.com/a/b',
+    'git://github.com/a/b/': 'https://github.com/a/b',
+    'https://sf.net/p/foo/': 'https://sourceforge.net/projects/foo',
+    'https://foo.sourceforge.io/': 'https://foo.sourceforge.net',
+    'svn://svn.x.org:3690/trunk/': 'svn://svn.x.org/trunk',
+    'https://x.org/a?b=c#d': 'https://x.org/a?b=c',
+    'http://x.org:8080/': 'https://x.org:8080'}
+
+
+if __name__ == "__main__":
+
+    failed = 0
+    for text, expected in extract_examples.items():
+        if extract_urls(text) != expected:
+            print('extract_urls("{}") is {}, expected {}'.format(text, extract_urls(text), expected))
+            failed += 1
+    for url, expected in canonical_examples.items():
+        if canonical_url(url) != expected:
+            print('canonical_url("{}") is {}, expected {}'.format(url, canonical_url(url), expected))
+            failed += 1
+    if failed:
+        raise RuntimeError('{} examples not as expected'.format(failed))
+
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+    entries = list(entry_iterator(os.path.join(root_path, 'games')))
+
+    # the former regex of check_validity_external_links
+    regex = re.compile(r"[\s\n<(](http://.*?)[\s\n>)]")
+    former = [url for _, _, content in entries for url in regex.findall(content)]
+
+    start = time.perf_counter()
+    index = UrlIndex.build(entries)
+    duration = time.perf_counter() - start
+    occurrences = sum(len(x) for x in index.entries.values())
+    variants = sum(len(x) for x in index.variants.values())
+    shared = sum(1 for x in index.entries.values() if len(x) > 1)
+
+    print('{} entries'.format(len(entries)))
+    print('former regex: {} urls ({} distinct)'.format(len(former), len(set(former))))
+    print('   url index: {} distinct urls with {} variants in {} entry occurrences, {} in several entries, built in {:.0f} ms'.format(
+        len(index), variants, occurrences, shared, duration * 1000))
@@ -1,47 +1,72 @@
 """
-Checks a list of game names (comma separated in text file) if they are already included in the database.
+Checks a list of game names if they are already included in the database.
 Is fuzzy, i.e. accepts a certain similarity of names.
+
+The names are read from a text file (or stdin with "-"), one name per line or all in one line separated by commas.
+The results are printed as text, JSON or CSV with the similarities of the matching names. For example:
+
+python is_already_included.py names.txt --format csv --jobs 0 > results.csv
 """
 
-import json
-import re
-from difflib import SequenceMatcher
-from utils.utils import *
+import sys
+import argparse
+import csv
+import contextlib
+from utils.osg import *
+
+
+def read_test_names(text):
+    """
+    Splits the text into names, by lines if there are multiple lines, otherwise by commas.
+    """
+    separator = '\n' if '\n' in text.strip() else ','
+    names = (x.strip() for x in text.split(separator))
+    return [x for x in names if x]
 
-def similarity(a, b):
-    return SequenceMatcher(None, a, b).ratio()
 
 if __name__ == "__main__":
-    similarity_threshold = 0.7
+
+    parser = argparse.ArgumentParser(description='Checks if game names are already included (fuzzy).')
+    parser.add_argument('file', nargs='?', help='file with the names to check, "-" for stdin (default is_already_included.txt in the root)')
+    parser.add_argument('--format', choices=('text', 'json', 'csv'), default='text', help='output format')
+    parser.add_argument('--threshold', type=float, default=0.7, help='minimal similarity of names (0-1)')
+    parser.add_argument('--jobs', type=int, default=1, help='number of processes matching the names (0 for all CPUs)')
+    parser.add_argument('--cache', action='store_true', help='only parse new or changed entries, using a parse cache in tools/')
+    args = parser.parse_args()
 
     root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
 
-    # read docs/data.json
-    data_file = os.path.join(root_path, 'docs', 'data.json')
-    text = read_text(data_file)
-    data = json.loads(text)
+    # read names to test
+    if args.file == '-':
+        text = sys.stdin.read()
+    else:
+        text = read_text(args.file or os.path.join(root_path, 'is_already_included.txt'))
+    test_names = read_test_names(text)
 
-    # extract game names
-    data = data['data']
-    data = (x[0] for x in data)
-    existing_names = list(re.sub(r' \([^)]*\)', '', x) for x in data)
+    # names of the existing entries (progress output must not go into the results)
+    with contextlib.redirect_stdout(sys.stderr):
+        catalog = Catalog(root_path, default_parse_cache_file if args.cache else None, snapshot_file=default_catalog_snapshot_file)
+        existing_names_index = FuzzyNameIndex(info['name'] for info in catalog.infos)
 
-    # read names to test
-    test_file = os.path.join(root_path, 'is_already_included.txt')
-    text = read_text(test_file)
-    test_names = text.split(', ')
-
-    # loop over all test names
-    for test_name in test_names:
-        matches = []
-        # loop over all existing names
-        for existing_name in existing_names:
-            s = similarity(test_name.lower(), existing_name.lower())
-            if s > similarity_threshold:
-                matches.append('{} ({:.2f})'.format(existing_name, s))
-        # were matches found
-        if matches:
-            print('{} maybe included in {}'.format(test_name, ', '.join(matches)))
-        else:
-            print('{} not included'.format(test_name))
+    # match all test names
+    results = existing_names_index.lookup_all(test_names, args.threshold, args.jobs)
 
+    # output
+    if args.format == 'json':
+        results = [{'name': name, 'matches': [{'name': x, 'similarity': round(s, 4)} for x, s in matches]} for name, matches in zip(test_names, results)]
+        json.dump(results, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+    elif args.format == 'csv':
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow(('name', 'match', 'similarity'))
+        for name, matches in zip(test_names, results):
+            if not matches:
+                writer.writerow((name, '', ''))
+            for x, s in matches:
+                writer.writerow((name, x, '{:.4f}'.format(s)))
+    else:
+        for name, matches in zip(test_names, results):
+            if matches:
+                print('{} maybe included in {}'.format(name, ', '.join('{} ({:.2f})'.format(x, s) for x, s in matches)))
+            else:
+                print('{} not included'.format(name))
@@ -7,6 +7,7 @@ unique imported fields: 'assets license', 'categories', 'code language', 'code l
 """
 
 import json
+import argparse
 from utils.osg import *
 
 
@@ -40,6 +41,11 @@ def list_compare(a, b, k):
 
 if __name__ == "__main__":
 
+    # command line arguments
+    parser = argparse.ArgumentParser(description='Synchronizes the entries with the libregamewiki import.')
+    parser.add_argument('--cache', action='store_true', help='only parse new or changed entries, using a parse cache in tools/')
+    args = parser.parse_args()
+
     similarity_threshold = 0.8
 
     # paths
@@ -93,8 +99,8 @@ if __name__ == "__main__":
     print('{}: {}'.format('engine', get_unique_field_content('engine', lgw_entries)))
 
     # read our database
-    games_path = os.path.join(root_path, 'games')
-    our_entries = assemble_infos(games_path)
+    our_catalog = Catalog(root_path, default_parse_cache_file if args.cache else None, snapshot_file=default_catalog_snapshot_file)
+    our_entries = our_catalog.infos
     print('{} entries with us'.format(len(our_entries)))
 
     # just the names
@@ -117,25 +123,21 @@ if __name__ == "__main__":
     for lgw_entry in lgw_entries:
         lgw_name = lgw_entry['name']
         
-        is_included = False
-        for our_entry in our_entries:
-            our_name = our_entry['name']
-
-            # find those that entries in LGW that are also in our database and compare them
-            if lgw_name == our_name:
-                is_included = True
-                # a match, check the fields
-                name = lgw_name
+        # find those that entries in LGW that are also in our database and compare them
+        our_entry = our_catalog.by_name(lgw_name)
+        if our_entry is not None:
+            # a match, check the fields
+            name = lgw_name
 
-                p = ''
+            p = ''
 
-                # platform
-                key = 'platform'
-                p += list_compare(lgw_entry.get(key, []), our_entry.get(key, []), key)
+            # platform
+            key = 'platform'
+            p += list_compare(lgw_entry.get(key, []), our_entry.get(key, []), key)
 
-                # code language
-                key = 'code language'
-                p += list_compare(lgw_entry.get(key, []), our_entry.get(key, []), key)
+            # code language
+            key = 'code language'
+            p += list_compare(lgw_entry.get(key, []), our_entry.get(key, []), key)
 
-                if p:
-                    print('{}\n{}'.format(name, p))
\ No newline at end of file
+            if p:
+                print('{}\n{}'.format(name, p))
\ No newline at end of file
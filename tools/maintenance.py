@@ -8,15 +8,31 @@
     This script runs with Python 3, it could also with Python 2 with some minor tweaks probably.
 """
 
-import urllib.request
-import http.client
+import io
+import argparse
+import time
 import datetime
 import json
 import textwrap
+import functools
 from utils.osg import *
+from utils.link_checker import LinkChecker, LinkCache, permanent_target
 
+regex_statistics_timestamp = re.compile(r"^analyzed \d+ entries on .*$", re.MULTILINE)
 
-def update_readme_and_tocs(infos):
+
+def toc_categories():
+    """
+    Returns (keyword, title, name, toc file) of all categories, the first being all entries (keyword None).
+    """
+    categories = [(None, 'All', 'All', '_all.md')]
+    for keyword in recommended_keywords:
+        name = keyword.replace(' ', '-')
+        categories.append((keyword, keyword.capitalize(), name, '_{}.md'.format(name)))
+    return categories
+
+
+def update_readme_and_tocs(catalog):
     """
     Recounts entries in sub categories and writes them to the readme.
     Also updates the _toc files in the categories directories.
@@ -28,14 +44,38 @@ def update_readme_and_tocs(infos):
     """
     print('update readme and toc files')
 
-    # delete all toc files
-    entries = os.listdir(games_path)
-    entries = (x for x in entries if x.startswith('_'))
+    # delete toc files that do not belong to any category anymore
+    toc_files = [x[3] for x in toc_categories()]
+    entries = os.listdir(catalog.games_path)
+    entries = (x for x in entries if x.startswith('_') and x not in toc_files)
     for entry in entries:
-        os.remove(os.path.join(games_path, entry))
+        os.remove(os.path.join(catalog.games_path, entry))
+
+    # create all toc
+    update_tocs(catalog)
+
+    # and the readme entry
+    update_readme(catalog)
+
+
+def update_tocs(catalog, keywords=None):
+    """
+    Writes the toc files of all categories or only of the categories of the given keywords (None for all entries).
+    """
+    for keyword, title, _, file in toc_categories():
+        if keywords is not None and keyword not in keywords:
+            continue
+        infos_filtered = catalog.infos if keyword is None else catalog.by_keyword(keyword)
+        create_toc(os.path.join(catalog.games_path, file), title, infos_filtered)
+
+
+def update_readme(catalog):
+    """
+    Writes the number of entries in each category to the readme.
+    """
 
     # read readme
-    readme_file = os.path.join(root_path, 'README.md')
+    readme_file = os.path.join(catalog.root_path, 'README.md')
     readme_text = read_text(readme_file)
 
     # compile regex for identifying the building blocks
@@ -49,20 +89,15 @@ def update_readme_and_tocs(infos):
     start = matches[0]
     end = matches[2]
 
-    # create all toc and readme entry
-    title = 'All'
-    file = '_all.md'
-    update_prefix = '**[{}](games/{}#{})** ({})'.format(title, file, title, len(infos))
-    create_toc(title, file, infos)
+    # readme entry for all and every category
+    categories = toc_categories()
+    _, title, _, file = categories[0]
+    update_prefix = '**[{}](games/{}#{})** ({})'.format(title, file, title, len(catalog.infos))
 
     update = []
-    for keyword in recommended_keywords:
-        infos_filtered = [x for x in infos if keyword in x['keywords']]
-        title = keyword.capitalize()
-        name = keyword.replace(' ', '-')
-        file = '_{}.md'.format(name)
-        update.append('**[{}](games/{}#{})** ({})'.format(title, file, name, len(infos_filtered)))
-        create_toc(title, file, infos_filtered)
+    for keyword, title, name, file in categories[1:]:
+        number = len(catalog.by_keyword(keyword))
+        update.append('**[{}](games/{}#{})** ({})'.format(title, file, name, number))
     update.sort()
     update.insert(0, update_prefix)
     update = ', '.join(update)
@@ -72,16 +107,13 @@ def update_readme_and_tocs(infos):
     text = start + "[comment]: # (start of autogenerated content, do not edit)\n" + update + "\n[comment]: # (end of autogenerated content)" + end
 
     # write to readme
-    write_text(readme_file, text)
+    write_text_if_changed(readme_file, text)
 
 
-def create_toc(title, file, entries):
+def create_toc(toc_file, title, entries):
     """
 
     """
-    # file path
-    toc_file = os.path.join(games_path, file)
-
     # header line
     text = '[comment]: # (autogenerated content, do not edit)\n# {}\n\n'.format(title)
 
@@ -97,61 +129,124 @@ def create_toc(title, file, entries):
     text += '\n'.join(rows)
 
     # write to toc file
-    write_text(toc_file, text)
+    write_text_if_changed(toc_file, text)
 
 
-def check_validity_external_links():
+def check_validity_external_links(catalog, checker=None, results_file=None, cache=None):
     """
-    Checks all external links it can find for validity. Prints those with non OK HTTP responses. Does only need to be run
-    from time to time.
+    Checks all external links it can find for validity, concurrently (see LinkChecker, with its default settings if no
+    checker is given). Prints those with non OK HTTP responses and writes all results (with the entries containing each
+    link) to a json file (default tools/links.json). Does only need to be run from time to time.
+
+    Links recently checked are taken from the cache (default a LinkCache in tools/links_cache.jsonl with its default
+    times to live), the others are checked conditionally where possible.
     """
 
     print("check external links (can take a while)")
 
-    # regex for finding urls (can be in <> or in ]() or after a whitespace
-    #regex = re.compile(r"[\s\n]<(http.+?)>|\]\((http.+?)\)|[\s\n](http[^\s\n,]+?)[\s\n\)]")
-    regex = re.compile(r"[\s\n<(](http://.*?)[\s\n>)]")
-
-    # count
-    number_checked_links = 0
-
     # ignore the following urls (they give false positives here)
-    ignored_urls = ('https://git.tukaani.org/xz.git')
+    ignored_urls = ('https://git.tukaani.org/xz.git',)
+
+    # all http(s) urls (and not sourceforge git urls) once, checked in one of their variants
+    index = catalog.url_index()
+    urls = {}
+    for key in index:
+        url = index.representative(key)
+        if url.startswith(('http://', 'https://')) and not url.startswith('https://git.code.sf.net/p/') and url not in ignored_urls:
+            urls[url] = key
+
+    # check each url once
+    checker = checker or LinkChecker(verbose=True)
+    cache = cache or LinkCache(os.path.join(catalog.root_path, 'tools', 'links_cache.jsonl'))
+    results = checker.run(list(urls.keys()), cache)
+    cache.save()
+    for result in results:
+        key = urls[result['url']]
+        result['variants'] = index.variants[key]
+        result['entries'] = index.entries[key]
+        if result['status'] is None or result['status'] >= 400:
+            for entry in result['entries']:
+                print("{}: {} - {}".format(entry, result['url'], result['status'] or result['error']))
+
+    print("{} links checked ({} from the cache, {} not modified), {} requests".format(len(results),
+        sum(1 for x in results if x['cached']), sum(1 for x in results if x['not modified']), checker.number_requests))
+    print("{} links permanently moved (replace them with --rewrite-redirects)".format(sum(1 for x in results if permanent_target(x))))
+
+    results_file = results_file or os.path.join(catalog.root_path, 'tools', 'links.json')
+    write_text(results_file, json.dumps(results, indent=1, ensure_ascii=False))
+
+
+def rewrite_permanent_redirects(catalog, results):
+    """
+    Replaces the links that permanently moved (see permanent_target) according to link check results (like written by
+    check_validity_external_links) by their new location in all entries containing them. Only the url as it was
+    checked is replaced, not its other variants (with .git, another scheme, ..), which may need to stay in their
+    form. Each affected entry is read and written once and only if it still parses afterwards.
+    """
 
-    # iterate over all entries
-    for _, entry_path, content in entry_iterator(games_path):
+    print('rewrite permanently redirected links')
+
+    # new urls by entry
+    replacements = {}
+    for result in results:
+        target = permanent_target(result)
+        if target is None:
+            continue
+        for entry in result['entries']:
+            replacements.setdefault(entry, {})[result['url']] = target
+
+    # apply
+    number_replaced = 0
+    for entry, entry_replacements in sorted(replacements.items()):
+        entry_path = os.path.join(catalog.games_path, entry)
+        if not os.path.isfile(entry_path):
+            continue
+        content = read_text(entry_path)
+        new_content = replace_urls(content, entry_replacements)
+        if new_content == content:
+            continue
+        try:
+            parse_entry(new_content)
+        except Exception as e:
+            print('{}: not rewritten, would not parse anymore ({})'.format(entry, e))
+            continue
+        write_text(entry_path, new_content)
+        number_replaced += 1
 
-            # apply regex
-            matches = regex.findall(content)
+    print('links rewritten in {} entries'.format(number_replaced))
 
-            # for each match
-            for match in matches:
 
-                # for each possible clause
-                for url in match:
+def template_matcher(catalog):
+    """
+    Returns a matcher for all lines of the template that must not be found in any entry.
+    """
+    text = read_text(os.path.join(catalog.root_path, 'template.md'))
+    text = text.split('\n')
+    return MultiPatternMatcher([x for x in text if x and not x.startswith('##')])
 
-                    # if there was something (and not a sourceforge git url)
-                    if url and not url.startswith('https://git.code.sf.net/p/') and url not in ignored_urls:
-                        try:
-                            # without a special header, frequent 403 responses occur
-                            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; WOW64)'})
-                            urllib.request.urlopen(req)
-                        except urllib.error.HTTPError as e:
-                            print("{}: {} - {}".format(os.path.basename(entry_path), url, e.code))
-                        except urllib.error.URLError as e:
-                            print("{}: {} - {}".format(os.path.basename(entry_path), url, e.reason))
-                        except http.client.RemoteDisconnected:
-                            print("{}: {} - disconnected without response".format(os.path.basename(entry_path), url))
 
-                        number_checked_links += 1
+def template_leftovers(entry, content, matcher):
+    """
+    Returns descriptions (with line and column) of all template leftovers in the content of an entry.
+    """
+    leftovers = []
+    for position, check_string in matcher.find_all(content):
+        line = content.count('\n', 0, position) + 1
+        column = position - content.rfind('\n', 0, position)
+        leftovers.append('{}:{}:{}: found {}'.format(entry, line, column, check_string))
+    return leftovers
 
-                        if number_checked_links % 50 == 0:
-                            print("{} links checked".format(number_checked_links))
 
-    print("{} links checked".format(number_checked_links))
+def report_template_leftovers(leftovers):
+    """
+    Prints all template leftovers and raises an error if there were any.
+    """
+    if leftovers:
+        print('\n'.join(leftovers))
+        raise RuntimeError('{} template leftovers found'.format(len(leftovers)))
 
 
-def check_template_leftovers():
+def check_template_leftovers(catalog):
     """
     Checks for template leftovers.
 
@@ -161,361 +256,406 @@ def check_template_leftovers():
     print('check for template leftovers')
 
     # load template and get all lines
-    text = read_text(os.path.join(root_path, 'template.md'))
-    text = text.split('\n')
-    check_strings = [x for x in text if x and not x.startswith('##')]
+    matcher = template_matcher(catalog)
 
     # iterate over all entries
-    for _, entry_path, content in entry_iterator(games_path):
+    leftovers = []
+    for entry, _, content in entry_iterator(catalog.games_path):
+        leftovers.extend(template_leftovers(entry, content, matcher))
+    report_template_leftovers(leftovers)
 
-        for check_string in check_strings:
-            if content.find(check_string) >= 0:
-                raise RuntimeError('{}: found {}'.format(os.path.basename(entry_path), check_string))
 
+def split_at_field(content, marker):
+    """
+    Splits the content at the last occurrence of a field marker (like "- Keywords:") into the text before the marker,
+    the rest of that line and the text after it. Returns None if the marker is not found.
 
-def fix_entries():
+    Same as matching (.*)marker([^\n]*)(.*) with re.DOTALL, without the quadratic backtracking if the marker is missing.
     """
-    Fixes the keywords, code dependencies, build systems, .. entries, mostly by automatically sorting them.
+    index = content.rfind(marker)
+    if index < 0:
+        return None
+    start = index + len(marker)
+    end = content.find('\n', start)
+    if end < 0:
+        end = len(content)
+    return content[:index], content[start:end], content[end:]
+
+
+def fix_keywords(entry, content):
+    """
+    Returns the content with the keywords sorted (category first), deduplicated and some abbreviations replaced.
     """
 
-    # TODO also sort other fields, only read once and then do all, move to separate file
+    # split at field
+    match = split_at_field(content, '- Keywords:')
+    if not match:
+        raise RuntimeError('Could not find keywords in entry "{}"'.format(entry))
 
-    print('fix entries')
+    # get elements out, split, strip, delete duplicates
+    elements = match[1].split(',')
+    elements = [x.strip() for x in elements]
+    elements = list(set(elements))
 
-    # keywords
-    regex = re.compile(r"(.*)- Keywords:([^\n]*)(.*)", re.DOTALL)
+    # get category out
+    category = None
+    for keyword in recommended_keywords:
+        if keyword in elements:
+            elements.remove(keyword)
+            category = keyword
+            break
+    if category is None:
+        raise RuntimeError('Entry "{}" contains no recommended keyword'.format(entry))
+
+    # special treatments here
+    elements = [x if x != 'TBS' and x != 'TB' else 'turn based' for x in elements]
+    elements = [x if x != 'RTS' else 'real time' for x in elements]
+    elements = [x if x != 'MMO' else 'massive multiplayer online' for x in elements]
+    elements = [x if x != 'MMO' else 'multiplayer online' for x in elements]
+    elements = [x if x != 'SP' else 'singleplayer' for x in elements]
+    elements = [x if x != 'MP' else 'multiplayer' for x in elements]
+    elements = [x if x != 'engine' else 'game engine' for x in elements]
+    elements = [x if x != 'rpg' else 'role playing' for x in elements]
+    elements = [x if x != 'turn based' else 'turn-based' for x in elements]
+    for keyword in ('browser', 'misc', 'tools'):
+        if keyword in elements:
+            elements.remove(keyword)
+
+    # sort
+    elements.sort(key=str.casefold)
+
+    # add category
+    elements.insert(0, category)
+
+    keywords = '- Keywords: {}'.format(', '.join(elements))
+
+    return match[0] + keywords + match[2]
+
+
+def fix_code_dependencies(content):
+    """
+    Returns the content with the code dependencies sorted, deduplicated and some names unified.
+    """
 
-    # iterate over all entries
-    for entry, entry_path, content in entry_iterator(games_path):
-
-        # match with regex
-        matches = regex.findall(content)
-        if len(matches) != 1:
-            raise RuntimeError('Could not find keywords in entry "{}"'.format(entry))
-
-        match = matches[0]
-
-        # get elements out, split, strip, delete duplicates
-        elements = match[1].split(',')
-        elements = [x.strip() for x in elements]
-        elements = list(set(elements))
-
-        # get category out
-        for keyword in recommended_keywords:
-            if keyword in elements:
-                elements.remove(keyword)
-                category = keyword
-                break
-
-        # special treatments here
-        elements = [x if x != 'TBS' and x != 'TB' else 'turn based' for x in elements]
-        elements = [x if x != 'RTS' else 'real time' for x in elements]
-        elements = [x if x != 'MMO' else 'massive multiplayer online' for x in elements]
-        elements = [x if x != 'MMO' else 'multiplayer online' for x in elements]
-        elements = [x if x != 'SP' else 'singleplayer' for x in elements]
-        elements = [x if x != 'MP' else 'multiplayer' for x in elements]
-        elements = [x if x != 'engine' else 'game engine' for x in elements]
-        elements = [x if x != 'rpg' else 'role playing' for x in elements]
-        elements = [x if x != 'turn based' else 'turn-based' for x in elements]
-        for keyword in ('browser', 'misc', 'tools'):
-            if keyword in elements:
-                elements.remove(keyword)
-
-        # sort
-        elements.sort(key=str.casefold)
-
-        # add category
-        elements.insert(0, category)
-
-        keywords = '- Keywords: {}'.format(', '.join(elements))
-
-        new_content = match[0] + keywords + match[2]
+    # split at field
+    match = split_at_field(content, '- Code dependencies:')
 
-        if new_content != content:
-            # write again
-            write_text(entry_path, new_content)
+    if not match:
+        # no code dependencies given
+        return content
 
-    # code dependencies
-    regex = re.compile(r"(.*)- Code dependencies:([^\n]*)(.*)", re.DOTALL)
+    # get code dependencies out, split, strip, delete duplicates
+    elements = match[1].split(',')
+    elements = [x.strip() for x in elements]
+    elements = list(set(elements))
 
-    # iterate over all entries
-    for entry, entry_path, content in entry_iterator(games_path):
-        # match with regex
-        matches = regex.findall(content)
+    # special treatments here
+    elements = [x if x != 'Blender' else 'Blender game engine' for x in elements]
+    elements = [x if x.lower() != 'libgdx' else 'libGDX' for x in elements]
+    elements = [x if x != 'SDL 2' else 'SDL2' for x in elements]
+    elements = [x if x.lower() != "ren'py" else "Ren'Py" for x in elements]
 
-        if not matches:
-            # no code dependencies given
-            continue
+    # sort
+    elements.sort(key=str.casefold)
+
+    code_dependencies = '- Code dependencies: {}'.format(', '.join(elements))
+
+    return match[0] + code_dependencies + match[2]
+
+
+def fix_build_system(content):
+    """
+    Returns the content with the build systems sorted and deduplicated.
+    """
 
-        match = matches[0]
+    # split at field
+    match = split_at_field(content, '- Build system:')
 
-        # get code dependencies out, split, strip, delete duplicates
-        elements = match[1].split(',')
-        elements = [x.strip() for x in elements]
-        elements = list(set(elements))
+    if not match:
+        # no build system given
+        return content
+
+    # get build systems out, split, strip, delete duplicates
+    elements = match[1].split(',')
+    elements = [x.strip() for x in elements]
+    elements = list(set(elements))
+
+    # special treatments here
+
+    # sort
+    elements.sort(key=str.casefold)
+
+    build_system = '- Build system: {}'.format(', '.join(elements))
+
+    return match[0] + build_system + match[2]
+
+
+def fix_entry(entry, content):
+    """
+    Applies all fixes to the content of an entry.
+    """
+    content = fix_keywords(entry, content)
+    content = fix_code_dependencies(content)
+    content = fix_build_system(content)
+    return content
+
+
+def fix_entries(catalog):
+    """
+    Fixes the keywords, code dependencies, build systems, .. entries, mostly by automatically sorting them.
+    """
 
-        # special treatments here
-        elements = [x if x != 'Blender' else 'Blender game engine' for x in elements]
-        elements = [x if x.lower() != 'libgdx' else 'libGDX' for x in elements]
-        elements = [x if x != 'SDL 2' else 'SDL2' for x in elements]
-        elements = [x if x.lower() != "ren'py" else "Ren'Py" for x in elements]
+    # TODO also sort other fields
 
-        # sort
-        elements.sort(key=str.casefold)
+    print('fix entries')
 
-        code_dependencies = '- Code dependencies: {}'.format(', '.join(elements))
+    # iterate over all entries
+    for entry, entry_path, content in entry_iterator(catalog.games_path):
 
-        new_content = match[0] + code_dependencies + match[2]
+        new_content = fix_entry(entry, content)
 
         if new_content != content:
             # write again
             write_text(entry_path, new_content)
 
-    # build systems
-    regex = re.compile(r"(.*)- Build system:([^\n]*)(.*)", re.DOTALL)
+
+def process_entries(catalog):
+    """
+    Reads every entry once, checks it for template leftovers, fixes it (writing it back only if it changed) and
+    parses it into the catalog. Same result as check_template_leftovers(), fix_entries() and catalog.parse() one after
+    another, also nothing is written if there are template leftovers.
+    """
+
+    print('check for template leftovers and fix entries')
+
+    # load template and get all lines
+    matcher = template_matcher(catalog)
 
     # iterate over all entries
-    for entry, entry_path, content in entry_iterator(games_path):
-        # match with regex
-        matches = regex.findall(content)
+    entries = []
+    leftovers = []
+    changed = []
+    for entry, entry_path, content in entry_iterator(catalog.games_path):
 
-        if not matches:
-            # no build system given
-            continue
+        # check for unfilled template lines
+        leftovers.extend(template_leftovers(entry, content, matcher))
 
-        match = matches[0]
+        # fix entry
+        new_content = fix_entry(entry, content)
+        if new_content != content:
+            changed.append((entry_path, new_content))
 
-        # get code dependencies out, split, strip, delete duplicates
-        elements = match[1].split(',')
-        elements = [x.strip() for x in elements]
-        elements = list(set(elements))
+        entries.append((entry, entry_path, new_content))
 
-        # special treatments here
+    report_template_leftovers(leftovers)
 
-        # sort
-        elements.sort(key=str.casefold)
+    # write fixed entries again
+    for entry_path, new_content in changed:
+        write_text(entry_path, new_content)
 
-        build_system = '- Build system: {}'.format(', '.join(elements))
+    # assemble info
+    catalog.parse(entries)
 
-        new_content = match[0] + build_system + match[2]
 
-        if new_content != content:
-            # write again
-            write_text(entry_path, new_content)
+# code hosted not on github, gitlab, bitbucket, launchpad, sourceforge
+popular_code_repositories = ('github.com', 'gitlab.com', 'bitbucket.org', 'code.sf.net', 'code.launchpad.net')
+regex_popular_code_repositories = re.compile('|'.join(map(re.escape, popular_code_repositories)))
 
 
-def update_statistics(infos):
+class StatisticsAggregation:
     """
-    Generates the statistics page.
+    Everything shown on the statistics page, gathered in a single pass over the entries: the number of occurrences of
+    every value of the counted fields, the number of entries with code dependencies and the names of the entries for the
+    lists (inactive by inactive year, without license, without download or play, code not on a popular site, C and C++
+    projects).
 
-    Should be done every time the entries change.
+    The lists of names are sorted by name (case insensitive, equal names in the order of the entries) already.
     """
 
-    print('update statistics')
+    counted_fields = ('code language', 'code license', 'keywords', 'code dependencies', 'build system', 'platform')
+
+    def __init__(self, infos):
+        self.number_entries = len(infos)
+        number_state_beta = number_state_mature = entries_with_code_dependency = 0
+        inactive_by_year = {}
+        entries_no_license = []
+        entries_no_download = []
+        entries_unpopular_repository = []
+        c_cpp_project_without_build_system = []
+        c_cpp_project_cmake = []
+
+        # all values of the counted fields one after another, counted at the end
+        values = {field: [] for field in self.counted_fields}
+        languages, licenses, keywords, dependencies, build_systems, platforms = (values[field].extend for field in self.counted_fields)
+
+        getter = GameEntry.getter('name', 'state', 'inactive', 'download', 'play', 'code repository', *self.counted_fields)
+        for name, state, inactive, download, play, repositories, language, license, keyword, dependency, build_system, platform in map(getter, infos):
+
+            # state
+            if 'beta' in state:
+                number_state_beta += 1
+            if 'mature' in state:
+                number_state_mature += 1
+            if inactive is not None:
+                inactive_by_year.setdefault(inactive, []).append(name)
+
+            # counted fields (essential fields are always there)
+            languages(language)
+            keywords(keyword)
+            if license is not None:
+                licenses(license)
+            else:
+                entries_no_license.append(name)
+            if dependency is not None:
+                dependencies(dependency)
+                entries_with_code_dependency += 1
+            if build_system is not None:
+                build_systems(build_system)
+            if platform is not None:
+                platforms(platform)
+
+            if download is None and play is None:
+                entries_no_download.append(name)
+
+            # if there are repositories, but none popular
+            if repositories is not None and not regex_popular_code_repositories.search('\n'.join(repositories)):
+                entries_unpopular_repository.append(name)
+
+            # C, C++ projects and their build systems
+            if 'C' in language or 'C++' in language:
+                if build_system is None:
+                    c_cpp_project_without_build_system.append(name)
+                elif 'CMake' in build_system:
+                    c_cpp_project_cmake.append(name)
+
+        self.number_state_beta = number_state_beta
+        self.number_state_mature = number_state_mature
+        self.entries_with_code_dependency = entries_with_code_dependency
+        self.counters = {field: Counter(values[field]) for field in self.counted_fields}
+
+        # sorted by name (stable, so equal names stay in the order of the entries)
+        self.inactive_by_year = {year: sorted(names, key=str.casefold) for year, names in inactive_by_year.items()}
+        self.entries_no_license = sorted(entries_no_license, key=str.casefold)
+        self.entries_no_download = sorted(entries_no_download, key=str.casefold)
+        self.entries_unpopular_repository = sorted(entries_unpopular_repository, key=str.casefold)
+        self.c_cpp_project_without_build_system = sorted(c_cpp_project_without_build_system, key=str.casefold)
+        self.c_cpp_project_cmake = sorted(c_cpp_project_cmake, key=str.casefold)
+
+    def frequencies(self, field):
+        """
+        Returns formatted lines "- value (percentage)" of all values of a field, the most frequent first, equally
+        frequent ones sorted by name.
+        """
+        counter = self.counters[field]
+        total = sum(counter.values())
+        values = sorted(counter.items(), key=lambda x: str.casefold(x[0])) # first sort by name
+        values.sort(key=lambda x: x[1], reverse=True) # then sort by occurrence (highest occurrence first)
+        return ['- {} ({:.1f}%)'.format(value, n / total * 100) for value, n in values]
+
+
+def write_statistics(aggregation, out):
+    """
+    Writes the statistics page from an aggregation of the entries to a text stream.
+    """
 
-    # start the page
-    statistics_file = os.path.join(root_path, 'statistics.md')
-    statistics = '[comment]: # (autogenerated content, do not edit)\n# Statistics\n\n'
+    out.write('[comment]: # (autogenerated content, do not edit)\n# Statistics\n\n')
 
     # total number
-    number_entries = len(infos)
+    number_entries = aggregation.number_entries
     rel = lambda x: x / number_entries * 100 # conversion to percent
 
-    statistics += 'analyzed {} entries on {}\n\n'.format(number_entries, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    out.write('analyzed {} entries on {}\n\n'.format(number_entries, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
 
     # State (beta, mature, inactive)
-    statistics += '## State\n\n'
+    out.write('## State\n\n')
 
-    number_state_beta = sum(1 for x in infos if 'beta' in x['state'])
-    number_state_mature = sum(1 for x in infos if 'mature' in x['state'])
-    number_inactive = sum(1 for x in infos if 'inactive' in x)
-    statistics += '- mature: {} ({:.1f}%)\n- beta: {} ({:.1f}%)\n- inactive: {} ({:.1f}%)\n\n'.format(number_state_mature, rel(number_state_mature), number_state_beta, rel(number_state_beta), number_inactive, rel(number_inactive))
+    number_state_beta = aggregation.number_state_beta
+    number_state_mature = aggregation.number_state_mature
+    number_inactive = sum(map(len, aggregation.inactive_by_year.values()))
+    out.write('- mature: {} ({:.1f}%)\n- beta: {} ({:.1f}%)\n- inactive: {} ({:.1f}%)\n\n'.format(number_state_mature, rel(number_state_mature), number_state_beta, rel(number_state_beta), number_inactive, rel(number_inactive)))
 
     if number_inactive > 0:
-        entries_inactive = [(x['name'], x['inactive']) for x in infos if 'inactive' in x]
-        entries_inactive.sort(key=lambda x: str.casefold(x[0]))  # first sort by name
-        entries_inactive.sort(key=lambda x: x[1], reverse=True) # then sort by inactive year (more recently first)
-        entries_inactive = ['{} ({})'.format(*x) for x in entries_inactive]
-        statistics += '##### Inactive State\n\n' + ', '.join(entries_inactive) + '\n\n'
-
-    # Language
-    statistics += '## Code Languages\n\n'
-    field = 'code language'
-
-    # those without language tag
-    # TODO the language tag is now an essential field, this cannot happen anymore
-    # number_no_language = sum(1 for x in infois if field not in x)
-    # if number_no_language > 0:
-    #     statistics += 'Without language tag: {} ({:.1f}%)\n\n'.format(number_no_language, rel(number_no_language))
-    #     entries_no_language = [x['name'] for x in infois if field not in x]
-    #     entries_no_language.sort()
-    #     statistics += ', '.join(entries_no_language) + '\n\n'
-
-    # get all languages together
-    languages = []
-    for info in infos:
-        if field in info:
-            languages.extend(info[field])
+        # by inactive year (more recently first), sorted by name within a year
+        entries_inactive = [' ({}), '.format(year).join(names) + ' ({})'.format(year) for year, names in sorted(aggregation.inactive_by_year.items(), reverse=True)]
+        out.write('##### Inactive State\n\n' + ', '.join(entries_inactive) + '\n\n')
 
-    unique_languages = set(languages)
-    unique_languages = [(l, languages.count(l) / len(languages)) for l in unique_languages]
-    unique_languages.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_languages.sort(key=lambda x: x[1], reverse=True) # then sort by occurrence (highest occurrence first)
-    unique_languages = ['- {} ({:.1f}%)\n'.format(x[0], x[1]*100) for x in unique_languages]
-    statistics += '##### Language frequency\n\n' + ''.join(unique_languages) + '\n'
+    # Language (an essential field, all entries have it)
+    out.write('## Code Languages\n\n')
+    out.write('##### Language frequency\n\n' + ''.join(x + '\n' for x in aggregation.frequencies('code language')) + '\n')
 
     # Licenses
-    statistics += '## Code licenses\n\n'
-    field = 'code license'
+    out.write('## Code licenses\n\n')
 
     # those without license
-    number_no_license = sum(1 for x in infos if field not in x)
-    if number_no_license > 0:
-        statistics += 'Without license tag: {} ({:.1f}%)\n\n'.format(number_no_license, rel(number_no_license))
-        entries_no_license = [x['name'] for x in infos if field not in x]
-        entries_no_license.sort()
-        statistics += ', '.join(entries_no_license) + '\n\n'
-
-    # get all licenses together
-    licenses = []
-    for info in infos:
-        if field in info:
-            licenses.extend(info[field])
+    entries_no_license = aggregation.entries_no_license
+    if entries_no_license:
+        out.write('Without license tag: {} ({:.1f}%)\n\n'.format(len(entries_no_license), rel(len(entries_no_license))))
+        out.write(', '.join(sorted(entries_no_license)) + '\n\n')
 
-    unique_licenses = set(licenses)
-    unique_licenses = [(l, licenses.count(l) / len(licenses)) for l in unique_licenses]
-    unique_licenses.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_licenses.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
-    unique_licenses = ['- {} ({:.1f}%)\n'.format(x[0], x[1]*100) for x in unique_licenses]
-    statistics += '##### Licenses frequency\n\n' + ''.join(unique_licenses) + '\n'
+    out.write('##### Licenses frequency\n\n' + ''.join(x + '\n' for x in aggregation.frequencies('code license')) + '\n')
 
     # Keywords
-    statistics += '## Keywords\n\n'
-    field = 'keywords'
-
-    # get all keywords together
-    keywords = []
-    for info in infos:
-        if field in info:
-            keywords.extend(info[field])
-
-    unique_keywords = set(keywords)
-    unique_keywords = [(l, keywords.count(l) / len(keywords)) for l in unique_keywords]
-    unique_keywords.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_keywords.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
-    unique_keywords = ['- {} ({:.1f}%)'.format(x[0], x[1]*100) for x in unique_keywords]
-    statistics += '##### Keywords frequency\n\n' + '\n'.join(unique_keywords) + '\n\n'
+    out.write('## Keywords\n\n')
+    out.write('##### Keywords frequency\n\n' + '\n'.join(aggregation.frequencies('keywords')) + '\n\n')
 
     # no download or play field
-    statistics += '## Entries without download or play fields\n\n'
-
-    entries = []
-    for info in infos:
-        if 'download' not in info and 'play' not in info:
-            entries.append(info['name'])
-    entries.sort(key=str.casefold)
-    statistics +=  '{}: '.format(len(entries)) + ', '.join(entries) + '\n\n'
+    out.write('## Entries without download or play fields\n\n')
+    entries = aggregation.entries_no_download
+    out.write('{}: '.format(len(entries)) + ', '.join(entries) + '\n\n')
 
     # code hosted not on github, gitlab, bitbucket, launchpad, sourceforge
-    popular_code_repositories = ('github.com', 'gitlab.com', 'bitbucket.org', 'code.sf.net', 'code.launchpad.net')
-    statistics += '## Entries with a code repository not on a popular site\n\n'
-
-    entries = []
-    field = 'code repository'
-    for info in infos:
-        if field in info:
-            popular = False
-            for repo in info[field]:
-                for popular_repo in popular_code_repositories:
-                    if popular_repo in repo:
-                        popular = True
-                        break
-            # if there were repositories, but none popular, add them to the list
-            if not popular:
-                entries.append(info['name'])
-                # print(info[field])
-    entries.sort(key=str.casefold)
-    statistics += '{}: '.format(len(entries)) + ', '.join(entries) + '\n\n'
+    out.write('## Entries with a code repository not on a popular site\n\n')
+    entries = aggregation.entries_unpopular_repository
+    out.write('{}: '.format(len(entries)) + ', '.join(entries) + '\n\n')
 
     # Code dependencies
-    statistics += '## Code dependencies\n\n'
-    field = 'code dependencies'
-
-    # get all code dependencies together
-    code_dependencies = []
-    entries_with_code_dependency = 0
-    for info in infos:
-        if field in info:
-            code_dependencies.extend(info[field])
-            entries_with_code_dependency += 1
-    statistics += 'With code dependency field {} ({:.1f}%)\n\n'.format(entries_with_code_dependency, rel(entries_with_code_dependency))
-
-    unique_code_dependencies = set(code_dependencies)
-    unique_code_dependencies = [(l, code_dependencies.count(l) / len(code_dependencies)) for l in unique_code_dependencies]
-    unique_code_dependencies.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_code_dependencies.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
-    unique_code_dependencies = ['- {} ({:.1f}%)'.format(x[0], x[1]*100) for x in unique_code_dependencies]
-    statistics += '##### Code dependencies frequency\n\n' + '\n'.join(unique_code_dependencies) + '\n\n'
+    out.write('## Code dependencies\n\n')
+    entries_with_code_dependency = aggregation.entries_with_code_dependency
+    out.write('With code dependency field {} ({:.1f}%)\n\n'.format(entries_with_code_dependency, rel(entries_with_code_dependency)))
+    out.write('##### Code dependencies frequency\n\n' + '\n'.join(aggregation.frequencies('code dependencies')) + '\n\n')
 
     # Build systems:
-    statistics += '## Build systems\n\n'
-    field = 'build system'
-
-    # get all build systems together
-    build_systems = []
-    for info in infos:
-        if field in info:
-            build_systems.extend(info[field])
-
-    statistics += 'Build systems information available for {:.1f}% of all projects.\n\n'.format(rel(len(build_systems)))
-
-    unique_build_systems = set(build_systems)
-    unique_build_systems = [(l, build_systems.count(l) / len(build_systems)) for l in unique_build_systems]
-    unique_build_systems.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_build_systems.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
-    unique_build_systems = ['- {} ({:.1f}%)'.format(x[0], x[1]*100) for x in unique_build_systems]
-    statistics += '##### Build systems frequency ({})\n\n'.format(len(build_systems)) + '\n'.join(unique_build_systems) + '\n\n'
+    out.write('## Build systems\n\n')
+    number_build_systems = sum(aggregation.counters['build system'].values())
+    out.write('Build systems information available for {:.1f}% of all projects.\n\n'.format(rel(number_build_systems)))
+    out.write('##### Build systems frequency ({})\n\n'.format(number_build_systems) + '\n'.join(aggregation.frequencies('build system')) + '\n\n')
 
     # C, C++ projects without build system information
-    c_cpp_project_without_build_system = []
-    for info in infos:
-        if field not in info and ('C' in info['code language'] or 'C++' in info['code language']):
-            c_cpp_project_without_build_system.append(info['name'])
-    c_cpp_project_without_build_system.sort(key=str.casefold)
-    statistics += '##### C and C++ projects without build system information ({})\n\n'.format(len(c_cpp_project_without_build_system)) + ', '.join(c_cpp_project_without_build_system) + '\n\n'
+    entries = aggregation.c_cpp_project_without_build_system
+    out.write('##### C and C++ projects without build system information ({})\n\n'.format(len(entries)) + ', '.join(entries) + '\n\n')
 
     # C, C++ projects with build system information but without CMake as build system
-    c_cpp_project_not_cmake = []
-    for info in infos:
-        if field in info and 'CMake' in info[field] and ('C' in info['code language'] or 'C++' in info['code language']):
-            c_cpp_project_not_cmake.append(info['name'])
-    c_cpp_project_not_cmake.sort(key=str.casefold)
-    statistics += '##### C and C++ projects with a build system different from CMake ({})\n\n'.format(len(c_cpp_project_not_cmake)) + ', '.join(c_cpp_project_not_cmake) + '\n\n'
+    entries = aggregation.c_cpp_project_cmake
+    out.write('##### C and C++ projects with a build system different from CMake ({})\n\n'.format(len(entries)) + ', '.join(entries) + '\n\n')
 
     # Platform
-    statistics += '## Platform\n\n'
-    field = 'platform'
+    out.write('## Platform\n\n')
+    number_platforms = sum(aggregation.counters['platform'].values())
+    out.write('Platform information available for {:.1f}% of all projects.\n\n'.format(rel(number_platforms)))
+    out.write('##### Platforms frequency\n\n' + '\n'.join(aggregation.frequencies('platform')) + '\n\n')
 
-    # get all platforms together
-    platforms = []
-    for info in infos:
-        if field in info:
-            platforms.extend(info[field])
 
-    statistics += 'Platform information available for {:.1f}% of all projects.\n\n'.format(rel(len(platforms)))
+def update_statistics(catalog):
+    """
+    Generates the statistics page.
+
+    Should be done every time the entries change.
+    """
+
+    print('update statistics')
+
+    statistics_file = os.path.join(catalog.root_path, 'statistics.md')
 
-    unique_platforms = set(platforms)
-    unique_platforms = [(l, platforms.count(l) / len(platforms)) for l in unique_platforms]
-    unique_platforms.sort(key=lambda x: str.casefold(x[0])) # first sort by name
-    unique_platforms.sort(key=lambda x: -x[1]) # then sort by occurrence (highest occurrence first)
-    unique_platforms = ['- {} ({:.1f}%)'.format(x[0], x[1]*100) for x in unique_platforms]
-    statistics += '##### Platforms frequency\n\n' + '\n'.join(unique_platforms) + '\n\n'
+    # gather everything in one pass, then write the page
+    aggregation = StatisticsAggregation(catalog.infos)
+    out = io.StringIO()
+    write_statistics(aggregation, out)
 
-    # write to statistics file
-    write_text(statistics_file, statistics)
+    # write to statistics file (but not if only the timestamp changed)
+    write_text_if_changed(statistics_file, out.getvalue(), regex_statistics_timestamp)
 
 
-def export_json(infos):
+def export_json(catalog):
     """
     Parses all entries, collects interesting info and stores it in a json file suitable for displaying
     with a dynamic table in a browser.
@@ -527,7 +667,7 @@ def export_json(infos):
     db = {'headings': ['Game', 'Description', 'Download', 'State', 'Keywords', 'Source']}
 
     entries = []
-    for info in infos:
+    for info in catalog.infos:
 
         # game & description
         entry = ['{} (<a href="{}">home</a>, <a href="{}">entry</a>)'.format(info['name'], info['home'][0],
@@ -573,9 +713,124 @@ def export_json(infos):
     db['data'] = entries
 
     # output
-    json_path = os.path.join(games_path, os.path.pardir, 'docs', 'data.json')
+    json_path = os.path.join(catalog.root_path, 'docs', 'data.json')
     text = json.dumps(db, indent=1)
-    write_text(json_path, text)
+    write_text_if_changed(json_path, text)
+
+
+def compact_rows(infos, previous_vocabularies=None):
+    """
+    The rows of the compact export (sorted by game name) and the vocabularies of states, keywords, code languages and
+    code licenses they refer to.
+
+    The vocabularies are append-only: the values of the previous vocabularies (of the last export) keep their indices
+    and new values are appended (sorted), so that adding a value does not change the rows of all shards. Values no
+    longer used stay in the vocabularies.
+    """
+    previous_vocabularies = previous_vocabularies or {}
+
+    # sorted by game name
+    infos = sorted(infos, key=lambda x: str.casefold(x['name']))
+
+    # vocabularies
+    vocabulary_fields = ('state', 'keywords', 'code language', 'code license')
+    vocabularies = {}
+    for field in vocabulary_fields:
+        previous = list(dict.fromkeys(previous_vocabularies.get(field, [])))
+        values = {value for info in infos for value in info.get(field, ())}.difference(previous)
+        vocabularies[field] = previous + sorted(values, key=lambda x: (str.casefold(x), x))
+    indices = {field: {value: index for index, value in enumerate(values)} for field, values in vocabularies.items()}
+
+    rows = []
+    for info in infos:
+        first = lambda field: info[field][0] if field in info and info[field] else None
+        encoded = lambda field: [indices[field][x] for x in info.get(field, ())]
+        rows.append([info['name'], info['home'][0], info['file'][:-3], textwrap.shorten(info['description'], width=60, placeholder='..'),
+                     first('download'), indices['state'][info['state'][0]], info.get('inactive', None), encoded('keywords'),
+                     first('code repository'), encoded('code language'), indices['code license'][first('code license')] if 'code license' in info else None])
+
+    return rows, vocabularies
+
+
+def export_compact_json(catalog, shard_size=100):
+    """
+    Exports the same table as export_json more compactly, for faster loading of docs/index.html: the cell contents
+    instead of rendered HTML, keywords, languages, licenses and states as indices into shared vocabularies, no
+    indentation. The rows (sorted by game name) are split into shards of shard_size rows (docs/data/shard-X.json) and a
+    manifest (docs/data/manifest.json) holds the vocabularies and the list of shards. The first shard is enough for
+    the first page of the table. A search index (docs/data/search.json, see SearchIndex) allows the page to find rows
+    by name, description and keywords without going through all rows. Every file also gets a gzip compressed copy (.gz).
+
+    A row is [name, home, entry file name, short description, download, state, inactive year, keywords, repository,
+    code languages, code license] with null for missing values.
+    """
+
+    print('export compact json for web display')
+
+    data_path = os.path.join(catalog.root_path, 'docs', 'data')
+    if not os.path.isdir(data_path):
+        os.mkdir(data_path)
+
+    # vocabularies of the last export (if any)
+    manifest_file = os.path.join(data_path, 'manifest.json')
+    previous_vocabularies = None
+    if os.path.isfile(manifest_file):
+        try:
+            previous_vocabularies = json.loads(read_text(manifest_file))['vocabularies']
+        except (ValueError, KeyError):
+            print('manifest {} unreadable, will renumber the vocabularies'.format(manifest_file))
+
+    rows, vocabularies = compact_rows(catalog.infos, previous_vocabularies)
+
+    # shards
+    shards = []
+    for start in range(0, len(rows), shard_size):
+        shard = 'shard-{}.json'.format(len(shards))
+        shards.append({'file': shard, 'rows': len(rows[start:start+shard_size])})
+        write_json_with_gzip_copy(os.path.join(data_path, shard), rows[start:start+shard_size])
+
+    # remove shards of a former export with more rows
+    for file in os.listdir(data_path):
+        if file.startswith('shard-') and file.split('.')[0] + '.json' not in (x['file'] for x in shards):
+            os.remove(os.path.join(data_path, file))
+
+    # search index over name, description and keywords of the rows
+    texts = [search_text(row, vocabularies) for row in rows]
+    write_json_with_gzip_copy(os.path.join(data_path, 'search.json'), SearchIndex.build(texts).to_json())
+
+    manifest = {'version': 1, 'headings': ['Game', 'Description', 'Download', 'State', 'Keywords', 'Source'],
+                'entry url': 'https://github.com/Trilarion/opensourcegames/blob/master/games/',
+                'vocabularies': vocabularies, 'rows': len(rows), 'shards': shards}
+    write_json_with_gzip_copy(manifest_file, manifest)
+
+
+def search_text(row, vocabularies):
+    """
+    The text of a compact row that is searched by the search index: name, short description and keywords, one per
+    line (docs/index.html builds the same text).
+    """
+    return '\n'.join((row[0], row[3], ', '.join(vocabularies['keywords'][x] for x in row[7])))
+
+
+def write_json_with_gzip_copy(file, data):
+    """
+    Writes data as compact json (if changed) and a gzip compressed copy of it.
+    """
+    text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    changed = write_text_if_changed(file, text)
+    write_gzip_copy(file, text, changed)
+
+
+def export_facet_index(catalog):
+    """
+    Builds the inverted index of keywords, languages, licenses, .. of all entries and stores it next to data.json, so
+    that query.py can answer queries without parsing the entries.
+    """
+
+    print('export facet index')
+
+    index = FacetIndex.build(catalog.infos)
+    index.save(os.path.join(catalog.root_path, 'docs', 'facets.json'))
 
 
 def git_repo(repo):
@@ -636,7 +891,7 @@ def bzr_repo(repo):
     return None
 
 
-def export_primary_code_repositories_json():
+def export_primary_code_repositories_json(catalog):
     """
 
     """
@@ -648,7 +903,7 @@ def export_primary_code_repositories_json():
 
     # for every entry filter those that are known git repositories (add additional repositories)
     field = 'code repository-raw'
-    for info in infos:
+    for info in catalog.infos:
         # if field 'Code repository' is available
         if field in info:
             consumed = False
@@ -698,12 +953,12 @@ def export_primary_code_repositories_json():
         primary_repos[k] = sorted(set(v))
 
     # write them to tools/git
-    json_path = os.path.join(root_path, 'tools', 'archives.json')
+    json_path = os.path.join(catalog.root_path, 'tools', 'archives.json')
     text = json.dumps(primary_repos, indent=1)
-    write_text(json_path, text)
+    write_text_if_changed(json_path, text)
 
 
-def export_git_code_repositories_json():
+def export_git_code_repositories_json(catalog):
     """
 
     """
@@ -712,7 +967,7 @@ def export_git_code_repositories_json():
     field = 'code repository'
 
     # for every entry, get all git
-    for info in infos:
+    for info in catalog.infos:
         # if field 'Code repository' is available
         if field in info:
             repos = info[field]
@@ -727,9 +982,115 @@ def export_git_code_repositories_json():
     urls.sort()
 
     # write them to tools/git
-    json_path = os.path.join(root_path, 'tools', 'git_repositories.json')
+    json_path = os.path.join(catalog.root_path, 'tools', 'git_repositories.json')
     text = json.dumps(urls, indent=1)
-    write_text(json_path, text)
+    write_text_if_changed(json_path, text)
+
+
+# entry fields shown in the toc files
+toc_fields = ('name', 'file', 'code language', 'code license', 'state')
+
+
+class Artifact:
+    """
+    A generated file, the fields of the entries it depends on (keys of the parsed entries, all entries have them in
+    case entries are added or removed) and the function writing it from the catalog. The update functions only write
+    if the content changed and write atomically.
+    """
+
+    def __init__(self, name, fields, update):
+        self.name = name
+        self.fields = frozenset(fields)
+        self.update = update
+
+    def depends_on(self, fields):
+        return not self.fields.isdisjoint(fields)
+
+
+def artifacts():
+    """
+    All generated files.
+    """
+    artifacts = [Artifact('README.md', ('keywords',), update_readme)]
+    for keyword, _, _, file in toc_categories():
+        fields = toc_fields if keyword is None else toc_fields + ('keywords',)
+        artifacts.append(Artifact('games/' + file, fields, functools.partial(update_tocs, keywords=(keyword,))))
+    artifacts.extend((
+        Artifact('statistics.md', ('name', 'state', 'inactive', 'code language', 'code license', 'keywords', 'download', 'play', 'code repository', 'code dependencies', 'build system', 'platform'), update_statistics),
+        Artifact('docs/data.json', ('name', 'home', 'file', 'description', 'download', 'state', 'inactive', 'keywords', 'code repository', 'code language', 'code license'), export_json),
+        Artifact('docs/data/manifest.json', ('name', 'home', 'file', 'description', 'download', 'state', 'inactive', 'keywords', 'code repository', 'code language', 'code license'), export_compact_json),
+        Artifact('docs/facets.json', ('name', 'file') + FacetIndex.fields, export_facet_index),
+        Artifact('tools/archives.json', ('name', 'code repository-raw'), export_primary_code_repositories_json)))
+    return artifacts
+
+
+def watch_entries(catalog, interval):
+    """
+    Polls the entries every interval seconds and if entries were changed, added or deleted, parses only those again
+    and updates only the generated files depending on the changed fields (and of those only the files whose content
+    changed are written).
+
+    Entries are not fixed and not checked for template leftovers in this mode. Runs until interrupted.
+    """
+
+    print('watch entries every {} s (stop with Ctrl+C)'.format(interval))
+
+    infos = {info['file']: info for info in catalog.infos}
+    stamps = entry_stamps(catalog.games_path)
+    unparseable = set()
+
+    # fields changed since the last update of the generated files (kept if it failed, to update them again)
+    changed_fields = set()
+
+    while True:
+        time.sleep(interval)
+
+        # an error must not stop watching (entries deleted or written while reading them, ..)
+        try:
+
+            # changed and deleted entries
+            new_stamps = entry_stamps(catalog.games_path)
+            changed = [x for x in new_stamps if stamps.get(x, None) != new_stamps[x]]
+            deleted = [x for x in stamps if x not in new_stamps]
+            stamps = new_stamps
+            if not changed and not deleted and not changed_fields:
+                continue
+
+            # collect changed fields
+            for entry in deleted:
+                unparseable.discard(entry)
+                changed_fields.update(infos.pop(entry, ()))
+            for entry in changed:
+                try:
+                    info = parse_entry(read_text(os.path.join(catalog.games_path, entry)))
+                except Exception as e:
+                    # maybe still being edited (or just deleted), keep the old state of this entry
+                    print('{}: {}'.format(entry, str(e) or type(e).__name__))
+                    unparseable.add(entry)
+                    continue
+                unparseable.discard(entry)
+                info.file = entry
+                old = infos.get(entry, None)
+                if old is None:
+                    changed_fields.update(info)
+                else:
+                    changed_fields.update(key for key in set(old) | set(info) if old.get(key, None) != info.get(key, None))
+                infos[entry] = info
+            print('{} entries changed, {} deleted'.format(len(changed), len(deleted)))
+
+            # regenerate what depends on the changes
+            catalog.update(list(infos.values()), stamps)
+            for artifact in artifacts():
+                if artifact.depends_on(changed_fields):
+                    artifact.update(catalog)
+            changed_fields = set()
+
+            # the snapshot only if all entries could be parsed (it would not match the entries otherwise)
+            if not unparseable:
+                catalog.save_snapshot()
+
+        except Exception as e:
+            print('error while updating, will try again after the next poll: {}'.format(str(e) or type(e).__name__))
 
 
 def sort_text_file(file, name):
@@ -741,42 +1102,75 @@ def sort_text_file(file, name):
     text = sorted(list(set(text)), key=str.casefold)
     print('{} contains {} items'.format(name, len(text)))
     text = '\n'.join(text)
-    write_text(file, text)
+    write_text_if_changed(file, text)
 
 
 if __name__ == "__main__":
 
+    # command line arguments
+    parser = argparse.ArgumentParser(description='Maintenance of the entries and the generated files.')
+    parser.add_argument('--cache', action='store_true', help='only parse new or changed entries, using a parse cache in tools/')
+    parser.add_argument('--jobs', type=int, default=1, help='number of processes parsing the entries (0 for all CPUs)')
+    parser.add_argument('--check-links', action='store_true', help='also check all external links (takes a while), results in tools/links.json')
+    parser.add_argument('--link-timeout', type=float, default=15, help='seconds a single request of the link check may take')
+    parser.add_argument('--link-retries', type=int, default=2, help='number of repetitions of failed link checks (with growing waits)')
+    parser.add_argument('--link-ttl', type=float, default=7, help='days until working links are checked again (failed links after one day)')
+    parser.add_argument('--rewrite-redirects', action='store_true', help='first replace permanently redirected links in the entries by their new location (according to tools/links.json)')
+    parser.add_argument('--watch', action='store_true', help='afterwards watch the entries and regenerate what changed')
+    parser.add_argument('--interval', type=float, default=1, help='seconds between two polls in watch mode')
+    args = parser.parse_args()
+
     # paths
     root_path  = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
-    games_path = os.path.join(root_path, 'games')
+    catalog = Catalog(root_path, default_parse_cache_file if args.cache else None, args.jobs)
 
-    # check for unfilled template lines
-    check_template_leftovers()
+    # apply permanent redirects found by the last link check
+    if args.rewrite_redirects:
+        links_file = os.path.join(root_path, 'tools', 'links.json')
+        if os.path.isfile(links_file):
+            rewrite_permanent_redirects(catalog, json.loads(read_text(links_file)))
+        else:
+            print('no link check results, run with --check-links first')
 
-    # fix entries
-    fix_entries()
+    # check for unfilled template lines, fix entries and assemble info (reading each entry once)
+    process_entries(catalog)
 
-    # assemble info
-    infos = assemble_infos(games_path)
+    # snapshot of the parsed entries for the other tools
+    catalog.save_snapshot()
 
     # recount and write to readme and to tocs
-    update_readme_and_tocs(infos)
+    update_readme_and_tocs(catalog)
 
     # generate report
-    update_statistics(infos)
+    update_statistics(catalog)
 
     # update database for html table
-    export_json(infos)
+    export_json(catalog)
+
+    # compact and sharded database for html table
+    export_compact_json(catalog)
+
+    # update facet index for query.py
+    export_facet_index(catalog)
 
     # collect list of primary code repositories
-    export_primary_code_repositories_json()
+    export_primary_code_repositories_json(catalog)
 
     # collect list of git code repositories (only one per project) for git_statistics script
-    # export_git_code_repositories_json()
+    # export_git_code_repositories_json(catalog)
 
     # check external links (only rarely)
-    # check_validity_external_links()
+    if args.check_links:
+        check_validity_external_links(catalog, LinkChecker(timeout=args.link_timeout, retries=args.link_retries, verbose=True),
+                                      cache=LinkCache(os.path.join(root_path, 'tools', 'links_cache.jsonl'), ttl=args.link_ttl * 24 * 3600))
 
     # sort backlog and rejected
     sort_text_file(os.path.join(root_path, 'tools', 'backlog.txt'), 'backlog')
     sort_text_file(os.path.join(root_path, 'tools', 'rejected.txt'), 'rejected games list')
+
+    # regenerate on changes
+    if args.watch:
+        try:
+            watch_entries(catalog, args.interval)
+        except KeyboardInterrupt:
+            print('stopped watching')
@@ -34,6 +34,7 @@ images not used
 video: not used
 """
 
+import argparse
 import ruamel_yaml as yaml
 from utils.osg import *
 
@@ -70,6 +71,11 @@ def unique_field_contents(entries, field):
 
 if __name__ == "__main__":
 
+    # command line arguments
+    parser = argparse.ArgumentParser(description='Synchronizes the entries with the osgameclones data.')
+    parser.add_argument('--cache', action='store_true', help='only parse new or changed entries, using a parse cache in tools/')
+    args = parser.parse_args()
+
     similarity_threshold = 0.8
     maximal_newly_created_entries = 40
 
@@ -140,8 +146,8 @@ if __name__ == "__main__":
     print('osgc-content: {}'.format(unique_field_contents(osgc_entries, 'content')))
 
     # read our database
-    games_path = os.path.join(root_path, 'games')
-    our_entries = assemble_infos(games_path)
+    our_catalog = Catalog(root_path, default_parse_cache_file if args.cache else None, snapshot_file=default_catalog_snapshot_file)
+    our_entries = our_catalog.infos
     print('{} entries with us'.format(len(our_entries)))
 
     # just the names
@@ -153,10 +159,10 @@ if __name__ == "__main__":
     print('{} in both, {} only in osgameclones, {} only with us'.format(len(common_names), len(osgc_names), len(our_names)))
 
     # find similar names among the rest
+    our_names_index = FuzzyNameIndex(our_names)
     for osgc_name in osgc_names:
-        for our_name in our_names:
-            if game_name_similarity(osgc_name, our_name) > similarity_threshold:
-                print('{} - {}'.format(osgc_name, our_name))
+        for our_name, _ in our_names_index.lookup(osgc_name, similarity_threshold):
+            print('{} - {}'.format(osgc_name, our_name))
 
     newly_created_entries = 0
     # iterate over their entries
@@ -164,7 +170,8 @@ if __name__ == "__main__":
         osgc_name = osgc_entry['name']
 
         is_included = False
-        for our_entry in our_entries:
+        our_entry = our_catalog.by_name(osgc_name)
+        if our_entry is not None:
             our_name = our_entry['name']
 
             # find those that entries in osgameclones that are also in our database and compare them
@@ -307,10 +314,10 @@ if __name__ == "__main__":
             # determine file name
             print('create new entry for {}'.format(osgc_name))
             file_name = derive_canonical_file_name(osgc_name)
-            target_file = os.path.join(games_path, file_name)
+            target_file = os.path.join(our_catalog.games_path, file_name)
             if os.path.isfile(target_file):
                 print('warning: file {} already existing, save under slightly different name'.format(file_name))
-                target_file = os.path.join(games_path, file_name[:-3] + '-duplicate.md')
+                target_file = os.path.join(our_catalog.games_path, file_name[:-3] + '-duplicate.md')
                 if os.path.isfile(target_file):
                     continue # just for safety reasons
 
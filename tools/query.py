@@ -0,0 +1,55 @@
+"""
+Answers queries on the keywords, code languages, code licenses, code dependencies, platforms, states and build systems
+of the entries using the facet index in docs/facets.json (written by maintenance.py), i.e. without parsing the entries.
+
+Each term is "field=value" and all terms must match. Alternatives are separated by "|", "field!=value" excludes
+entries. For example:
+
+python query.py "code dependencies=SDL2" "code license=GPL-3.0|GPL-2.0" state=mature "platform!=Windows"
+"""
+
+import argparse
+from utils.osg import *
+
+
+def parse_term(term):
+    """
+    Splits a term "field=value1|value2" or "field!=value" into (field, values, negated).
+    """
+    if '=' not in term:
+        raise RuntimeError('Term "{}" is not of the form field=value'.format(term))
+    field, values = term.split('=', 1)
+    negated = field.endswith('!')
+    if negated:
+        field = field[:-1]
+    values = [x.strip() for x in values.split('|')]
+    return field.strip().lower(), values, negated
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Query the entries by keywords, languages, licenses, ..')
+    parser.add_argument('terms', nargs='*', help='field=value terms, all must match')
+    parser.add_argument('--values', metavar='FIELD', help='list all values of a field with the number of entries')
+    args = parser.parse_args()
+
+    # paths
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+    # load index
+    index = FacetIndex.load(os.path.join(root_path, 'docs', 'facets.json'))
+
+    if args.values:
+        field = args.values.lower()
+        if field not in index.postings:
+            raise RuntimeError('Field "{}" not in the facet index (only {})'.format(field, ', '.join(index.fields)))
+        values = sorted(index.postings[field].items(), key=lambda x: (-len(x[1]), str.casefold(x[0])))
+        for value, ids in values:
+            print('{} ({})'.format(value, len(ids)))
+
+    if args.terms:
+        ids = index.query([parse_term(term) for term in args.terms])
+        names = sorted((index.entries[x] for x in ids), key=lambda x: str.casefold(x[1]))
+        for file, name in names:
+            print('{} ({})'.format(name, file))
+        print('{} entries'.format(len(names)))
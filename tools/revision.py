@@ -0,0 +1,69 @@
+"""
+Works on the entries of any git revision of this repository without checking it out.
+
+python revision.py validate REVISION
+    parses all entries of the revision (like maintenance.py does for the working tree)
+
+python revision.py diff OLD_REVISION [NEW_REVISION]
+    lists the added, removed and changed entries (with the changed fields) between two revisions (default for the new
+    revision is HEAD), only the entries that differ are read and parsed
+"""
+
+import argparse
+from utils.osg import *
+
+
+def changed_keys(old_info, new_info):
+    """
+    Returns the keys (name, description, fields) whose values differ between two infos of an entry.
+    """
+    keys = [key for key in GameEntry.keys_attributes if not key.endswith('-raw')]
+    return [key for key in keys if old_info.get(key, None) != new_info.get(key, None)]
+
+
+def parse_blob(reader, entry, blob):
+    """
+    Parses an entry blob, errors name the entry.
+    """
+    try:
+        return parse_entry(reader.read_text(blob))
+    except Exception as e:
+        raise RuntimeError('{}: {}'.format(entry, str(e) or type(e).__name__)) from e
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Validate or compare the entries of git revisions.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    validate_parser = subparsers.add_parser('validate', help='parse all entries of a revision')
+    validate_parser.add_argument('revision')
+    diff_parser = subparsers.add_parser('diff', help='added, removed and changed entries between two revisions')
+    diff_parser.add_argument('old_revision')
+    diff_parser.add_argument('new_revision', nargs='?', default='HEAD')
+    args = parser.parse_args()
+
+    # paths
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+    games_path = os.path.join(root_path, 'games')
+
+    if args.command == 'validate':
+        infos = assemble_infos(games_path, entries=git_entry_iterator(root_path, args.revision))
+        print('{} entries of {} are valid'.format(len(infos), args.revision))
+
+    if args.command == 'diff':
+        changes = git_entry_changes(root_path, args.old_revision, args.new_revision)
+        with GitObjectReader(root_path) as reader:
+            for entry, old_blob, new_blob in changes:
+                if old_blob is None:
+                    print('added {}'.format(entry))
+                elif new_blob is None:
+                    print('removed {}'.format(entry))
+                else:
+                    # older entries may not follow the current format
+                    try:
+                        keys = changed_keys(parse_blob(reader, entry, old_blob), parse_blob(reader, entry, new_blob))
+                    except RuntimeError as e:
+                        print('changed {}, not comparable ({})'.format(entry, e))
+                        continue
+                    print('changed {}: {}'.format(entry, ', '.join(keys) if keys else 'formatting only'))
+        print('{} entries differ between {} and {}'.format(len(changes), args.old_revision, args.new_revision))
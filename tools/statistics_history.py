@@ -0,0 +1,141 @@
+"""
+Computes the number of entries, the shares of the code languages and code licenses and the ratio of inactive entries
+for every commit changing the entries (first parent history of the current branch) and appends them as time series
+to a file with one JSON object per line.
+
+Nothing is checked out. The changed entry blobs of each commit are taken from "git log --raw" and read through a
+single "git cat-file --batch" process, every distinct blob is parsed only once (also across runs by a blob cache in
+tools/). The numbers are updated with the changes of each commit only. Entries that cannot be parsed (older formats)
+are skipped and counted as unparseable.
+
+A second run continues after the last commit in the file.
+"""
+
+import argparse
+from utils.osg import *
+
+# only the aggregated fields of an entry
+history_fields = ('code language', 'code license')
+
+
+def last_commit(history_file):
+    """
+    The commit of the last line of the time series or None. An incomplete last line (of an interrupted run) is removed.
+    """
+    if not os.path.isfile(history_file):
+        return None
+    text = read_text(history_file)
+    if not text.endswith('\n'):
+        text = text[:text.rfind('\n') + 1]
+        write_text(history_file, text)
+    lines = text.splitlines()
+    return json.loads(lines[-1])['commit'] if lines else None
+
+
+def changed_entry_blobs(repository_path, revisions):
+    """
+    Yields (commit, commit date, {path: new blob hash or None if deleted}) for all commits in the revision range that
+    change the games folder, oldest first, following only the first parent (changes of merges relative to it).
+    """
+    log = git_output(repository_path, '-c', 'core.quotepath=off', 'log', '--reverse', '--first-parent', '-m', '--raw',
+                     '--no-abbrev', '--no-renames', '--format=commit %H %cI', revisions, '--', 'games/')
+    commit = None
+    for line in log.splitlines():
+        if line.startswith('commit '):
+            if commit:
+                yield commit
+            commit = line.split()[1:3] + [{}]
+        elif line.startswith(':'):
+            # :old mode, new mode, old blob, new blob, status <tab> path
+            meta, path = line.split('\t', 1)
+            if is_git_entry_path(path):
+                meta = meta.split()
+                commit[2][path] = None if meta[4] == 'D' else meta[3]
+    if commit:
+        yield commit
+
+
+class HistoryAggregation:
+    """
+    The numbers of the entries at one commit, updated by adding and removing single entries.
+    """
+
+    def __init__(self):
+        self.number_entries = 0
+        self.number_unparseable = 0
+        self.number_inactive = 0
+        self.counters = {field: Counter() for field in history_fields}
+
+    def update(self, info, sign):
+        """
+        Adds (sign = 1) or removes (sign = -1) an entry (info None for an unparseable entry).
+        """
+        if info is None:
+            self.number_unparseable += sign
+            return
+        self.number_entries += sign
+        if 'inactive' in info:
+            self.number_inactive += sign
+        for field, counter in self.counters.items():
+            for value in info.get(field, ()):
+                counter[value] += sign
+                if not counter[value]:
+                    del counter[value]
+
+    def record(self, commit, date):
+        """
+        The numbers as dictionary for the time series. Shares are relative to all values of a field (like in
+        statistics.md) and sorted by decreasing share.
+        """
+        record = {'commit': commit, 'date': date, 'entries': self.number_entries, 'unparseable': self.number_unparseable,
+                  'inactive': round(self.number_inactive / self.number_entries, 4) if self.number_entries else 0}
+        for field, counter in self.counters.items():
+            total = sum(counter.values())
+            record[field] = {value: round(n / total, 4) for value, n in sorted(counter.items(), key=lambda x: (-x[1], str.casefold(x[0])))}
+        return record
+
+
+if __name__ == "__main__":
+
+    # paths
+    root_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+    code_path = os.path.join(root_path, 'tools')
+
+    parser = argparse.ArgumentParser(description='Time series of statistics of the entries over the commits.')
+    parser.add_argument('--output', default=os.path.join(code_path, 'statistics_history.jsonl'), help='time series file (one JSON object per line), is continued')
+    parser.add_argument('--revision', default='HEAD', help='last revision to include')
+    args = parser.parse_args()
+
+    # continue after the last commit if it is still in the history, otherwise start from the beginning
+    start = last_commit(args.output)
+    if start and subprocess.run(['git', 'merge-base', '--is-ancestor', start, args.revision], cwd=root_path).returncode:
+        print('last commit {} of {} not in the history of {}, starting over'.format(start, args.output, args.revision))
+        os.remove(args.output)
+        start = None
+
+    cache = BlobCache(os.path.join(code_path, 'statistics_history_cache.pickle'))
+    aggregation = HistoryAggregation()
+    number_commits = 0
+    with GitObjectReader(root_path) as reader, open(args.output, 'a', encoding='utf-8', newline='\n') as f:
+        try:
+            # state at the last commit
+            blobs = {}
+            if start:
+                blobs = git_entry_blobs(root_path, start)
+                for blob in blobs.values():
+                    aggregation.update(cache.parse(blob, reader), 1)
+
+            # apply the changes of every following commit
+            for commit, date, changes in changed_entry_blobs(root_path, '{}..{}'.format(start, args.revision) if start else args.revision):
+                for path, blob in changes.items():
+                    if path in blobs:
+                        aggregation.update(cache.parse(blobs.pop(path), reader), -1)
+                    if blob:
+                        blobs[path] = blob
+                        aggregation.update(cache.parse(blob, reader), 1)
+                f.write(json.dumps(aggregation.record(commit, date), ensure_ascii=False) + '\n')
+                number_commits += 1
+        finally:
+            cache.save()
+
+    print('{} commits added to {}, {} distinct entry blobs in the cache'.format(number_commits, args.output, len(cache.blobs)))
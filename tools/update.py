@@ -5,6 +5,9 @@ Requires: git executable in the path
 
 Uses 'git clone --mirror' to set up the git locally.
 
+Several repositories are cloned or updated at the same time (see --jobs), with at most a few at the same time from each
+host (see host_limits), so that the big hosters are not hammered.
+
 Warning: This may take a long time on the first run and may need a lot of storage space!
 
 TODO are really all existing branches cloned and pulled? (see https://stackoverflow.com/questions/67699/how-to-clone-all-remote-branches-in-git)
@@ -14,9 +17,21 @@ Note: May need to set http.postBuffer (https://stackoverflow.com/questions/17683
 """
 
 import json
+import time
+import argparse
+import urllib.parse
+import concurrent.futures
 
 from utils.utils import *
 
+# maximal number of repositories cloned or updated at the same time from a host (others see default_host_limit)
+host_limits = {
+    'github.com': 8,
+    'gitlab.com': 4,
+    'sourceforge.net': 2
+}
+default_host_limit = 4
+
 
 def derive_folder_name(url, replaces):
     sanitize = lambda x: x.replace('/', '.')
@@ -24,13 +39,26 @@ def derive_folder_name(url, replaces):
         if url.startswith(service):
             url = replaces[service] + url[len(service):]
             return sanitize(url)
-    for generic in ['http://', 'https://']:
+    for generic in ['http://', 'https://', 'file://']:
         if url.startswith(generic):
-            url = url[len(generic):]
+            url = url[len(generic):].lstrip('/')
             return sanitize(url)
     raise Exception('malformed url')
 
 
+def host_name(url):
+    """
+    The host an url counts against in host_limits (all of sourceforge together, 'local' for file urls).
+    """
+    host = urllib.parse.urlsplit(url).hostname or 'local'
+    for name in host_limits:
+        if host == name or host.endswith('.' + name):
+            return name
+    if host == 'sf.net' or host.endswith('.sf.net'):
+        return 'sourceforge.net'
+    return host
+
+
 def git_folder_name(url):
     replaces = {
         'https://github.com': 'github',
@@ -46,12 +74,11 @@ def git_folder_name(url):
 
 
 def git_clone(url, folder):
-    subprocess_run(["git", "clone", "--mirror", url, folder])
+    subprocess_run(["git", "clone", "--mirror", url, folder], display=False)
 
 
 def git_update(folder):
-    os.chdir(folder)
-    subprocess_run(["git", "fetch", "--all"])
+    subprocess_run(["git", "fetch", "--all"], display=False, cwd=folder)
 
 
 def svn_folder_name(url):
@@ -62,12 +89,11 @@ def svn_folder_name(url):
 
 
 def svn_clone(url, folder):
-    subprocess_run(["svn", "checkout", url, folder])
+    subprocess_run(["svn", "checkout", url, folder], display=False)
 
 
 def svn_update(folder):
-    os.chdir(folder)
-    subprocess_run(["svn", "update"])
+    subprocess_run(["svn", "update"], display=False, cwd=folder)
 
 
 def hg_folder_name(url):
@@ -80,12 +106,11 @@ def hg_folder_name(url):
 
 
 def hg_clone(url, folder):
-    subprocess_run(["hg", "clone", url, folder])
+    subprocess_run(["hg", "clone", url, folder], display=False)
 
 
 def hg_update(folder):
-    os.chdir(folder)
-    subprocess_run(['hg', 'pull', '-u'])
+    subprocess_run(['hg', 'pull', '-u'], display=False, cwd=folder)
 
 
 def bzr_folder_name(url):
@@ -96,15 +121,102 @@ def bzr_folder_name(url):
 
 
 def bzr_clone(url, folder):
-    subprocess_run(['bzr', 'branch', url, folder])
+    subprocess_run(['bzr', 'branch', url, folder], display=False)
 
 
 def bzr_update(folder):
-    os.chdir(folder)
-    subprocess_run(['bzr', 'pull'])
-
-
-def run_update(type, urls):
+    subprocess_run(['bzr', 'pull'], display=False, cwd=folder)
+
+
+folder_name = {
+    'git': git_folder_name,
+    'svn': svn_folder_name,
+    'hg': hg_folder_name,
+    'bzr': bzr_folder_name
+}
+
+clone = {
+    'git': git_clone,
+    'svn': svn_clone,
+    'hg': hg_clone,
+    'bzr': bzr_clone
+}
+
+update = {
+    'git': git_update,
+    'svn': svn_update,
+    'hg': hg_update,
+    'bzr': bzr_update
+}
+
+
+def run_tasks(tasks, jobs):
+    """
+    Runs tasks, each (host, name, function without arguments), with at most jobs at the same time and at most the
+    limit of its host (see host_limits) for each host, the hosts taking turns. Prints one line for each finished task
+    (from this thread only, so lines do not mix). Returns the names of the failed tasks.
+    """
+    # waiting tasks by host
+    waiting = {}
+    for task in tasks:
+        waiting.setdefault(task[0], []).append(task)
+    for host in waiting:
+        waiting[host].reverse()
+    running = {}
+    running_by_host = {host: 0 for host in waiting}
+    failed = []
+    number_done = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while waiting or running:
+
+            # start tasks of hosts below their limit (one host after another)
+            started = True
+            while started and len(running) < jobs:
+                started = False
+                for host in list(waiting.keys()):
+                    if len(running) >= jobs:
+                        break
+                    if running_by_host[host] >= host_limits.get(host, default_host_limit):
+                        continue
+                    task = waiting[host].pop()
+                    if not waiting[host]:
+                        del waiting[host]
+                    running_by_host[host] += 1
+                    running[executor.submit(timed_call, task[2])] = task
+                    started = True
+
+            # report finished tasks
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                host, name, _ = running.pop(future)
+                running_by_host[host] -= 1
+                number_done += 1
+                duration, error = future.result()
+                if error:
+                    failed.append(name)
+                    print('[{}/{}] {} failed after {:.1f} s: {}'.format(number_done, len(tasks), name, duration, error))
+                else:
+                    print('[{}/{}] {} ({:.1f} s)'.format(number_done, len(tasks), name, duration))
+    return failed
+
+
+def timed_call(function):
+    """
+    Duration of a call and its error message in one line (None if successful, only the fatal and error lines of the
+    output if there are some).
+    """
+    start = time.perf_counter()
+    try:
+        function()
+        error = None
+    except RuntimeError as e:
+        lines = str(e).splitlines() or ['error']
+        error = ' '.join([line for line in lines if line.startswith(('fatal:', 'error:', 'svn: E', 'abort:'))] or lines[:1])
+    return time.perf_counter() - start, error
+
+
+def run_update(type, urls, archive_folder, jobs=1):
     print('update {} {} archives'.format(len(urls), type))
     base_folder = os.path.join(archive_folder, type)
     if not os.path.exists(base_folder):
@@ -124,33 +236,22 @@ def run_update(type, urls):
     new_folders = [x for x in folders if x not in existing_folders]
     print('{} new archives, will clone'.format(len(new_folders)))
 
-    # add root to folders
-    folders = [os.path.join(base_folder, x) for x in folders]
-    os.chdir(base_folder)
+    # clone the new ones, update the others
+    tasks = []
     for folder, url in zip(folders, urls):
-        if url.startswith('https://git.code.sf.net/p/') or url.startswith('http://hg.code.sf.net/p/'):
-            continue
-        if not os.path.isdir(folder):
-            print('clone {} into {}'.format(url, folder[len(base_folder):]))
-            try:
-                clone[type](url, folder)
-            except RuntimeError as e:
-                print('error occurred while cloning, will skip')
-
-    # at the end update them all
-    for folder in folders:
-        print('update {}'.format(os.path.basename(folder)))
-        if not os.path.isdir(folder):
-            print('folder not existing, wanted to update, will skip')
-            continue
-        print('update {}'.format(folder[len(base_folder):]))
-        try:
-            update[type](folder)
-        except RuntimeError as e:
-            print('error occurred while updating, will skip')
-
-
-def run_info(type, urls):
+        path = os.path.join(base_folder, folder)
+        if folder in existing_folders:
+            tasks.append((host_name(url), 'update {}'.format(folder), lambda path=path: update[type](path)))
+        elif url.startswith('https://git.code.sf.net/p/') or url.startswith('http://hg.code.sf.net/p/'):
+            print('folder {} not existing, will skip'.format(folder))
+        else:
+            tasks.append((host_name(url), 'clone {} into {}'.format(url, folder), lambda url=url, path=path: clone[type](url, path)))
+    failed = run_tasks(tasks, jobs)
+    print('{} of {} {} archives failed'.format(len(failed), len(tasks), type))
+    return failed
+
+
+def run_info(type, urls, archive_folder):
     print('collect info on {}'.format(type))
 
     # get derived folder names
@@ -170,26 +271,11 @@ if __name__ == '__main__':
 
     supported_types = ['git', 'hg', 'svn']  # currently no bzr client installed
 
-    folder_name = {
-        'git': git_folder_name,
-        'svn': svn_folder_name,
-        'hg': hg_folder_name,
-        'bzr': bzr_folder_name
-    }
-
-    clone = {
-        'git': git_clone,
-        'svn': svn_clone,
-        'hg': hg_clone,
-        'bzr': bzr_clone
-    }
-
-    update = {
-        'git': git_update,
-        'svn': svn_update,
-        'hg': hg_update,
-        'bzr': bzr_update
-    }
+    parser = argparse.ArgumentParser(description='Clones and updates the repositories listed in archives.json.')
+    parser.add_argument('--jobs', type=int, default=8, help='number of repositories cloned or updated at the same time')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
 
     # get this folder
     root_folder = os.path.realpath(os.path.dirname(__file__))
@@ -204,13 +290,13 @@ if __name__ == '__main__':
         if type not in supported_types:
             continue
         urls = archives[type]
-        run_update(type, urls)
+        run_update(type, urls, archive_folder, args.jobs)
 
     # collect info
     infos = []
     for type in archives:
         urls = archives[type]
-        infos.extend(run_info(type, urls))
+        infos.extend(run_info(type, urls, archive_folder))
     infos.sort(key=lambda x: x[0], reverse=True)
     text = json.dumps(infos, indent=1)
     write_text(os.path.join(archive_folder, 'infos.json'), text)
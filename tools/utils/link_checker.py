@@ -0,0 +1,416 @@
+"""
+Checks many links concurrently with asyncio (standard library only) and keeps the results for some time.
+
+Connections are kept alive and reused per host (HTTP/1.1), the number of requests in flight is limited globally and
+per host. Every link is first requested with HEAD and, if that gives an error status (some servers do not support
+HEAD), with a GET of only the first byte (Range header). Bodies are only read if small, otherwise the connection is
+closed instead of downloading them. Redirects are followed. Failed checks (connection errors, timeouts, 429 and 5xx
+statuses) are repeated with exponential backoff.
+
+With a LinkCache, only links whose last result is older than a time to live are checked again and if possible
+conditionally (If-None-Match, If-Modified-Since).
+"""
+
+import ssl
+import time
+import json
+import asyncio
+import urllib.parse
+from utils.utils import *
+
+default_user_agent = 'Mozilla/5.0 (Windows NT 10.0; WOW64)'
+
+# statuses that are followed to the location
+redirect_statuses = (301, 302, 303, 307, 308)
+
+# statuses after which the check is repeated
+retry_statuses = (429, 500, 502, 503, 504)
+
+# bodies larger than this are not read, the connection is closed instead
+maximal_body_size = 65536
+
+
+class Response:
+    """
+    Status, reason and headers (lower case names) of a HTTP response and if its connection can be used again.
+    """
+
+    def __init__(self, status, reason, headers, reusable):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.reusable = reusable
+
+
+class ConnectionPool:
+    """
+    The idle keep-alive connections to one host (scheme, host, port) and the limit of requests in flight to it.
+    """
+
+    def __init__(self, scheme, host, port, limit, ssl_context):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.semaphore = asyncio.Semaphore(limit)
+        self.ssl_context = ssl_context
+        self.idle = []
+        self.number_opened = 0
+
+    async def open(self):
+        """
+        Opens a new connection, returns (reader, writer).
+        """
+        self.number_opened += 1
+        if self.scheme == 'https':
+            return await asyncio.open_connection(self.host, self.port, ssl=self.ssl_context, server_hostname=self.host)
+        return await asyncio.open_connection(self.host, self.port)
+
+    def take(self):
+        """
+        An idle connection or None.
+        """
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return None
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+def request_target(parts):
+    """
+    Path and query of a split url as ASCII request target.
+    """
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    return urllib.parse.quote(target, safe="/%:@!$&'()*+,;=?~")
+
+
+async def read_body(reader, headers):
+    """
+    Reads (and discards) a response body if it is small. Returns True if the body was read completely.
+    """
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        size = 0
+        while True:
+            line = await reader.readline()
+            chunk_size = int(line.split(b';')[0].strip() or b'0', 16)
+            if not chunk_size:
+                # trailers
+                while (await reader.readline()).strip():
+                    pass
+                return True
+            size += chunk_size
+            if size > maximal_body_size:
+                return False
+            await reader.readexactly(chunk_size + 2)
+    if 'content-length' in headers:
+        length = int(headers['content-length'])
+        if length > maximal_body_size:
+            return False
+        await reader.readexactly(length)
+        return True
+    # body until the connection closes
+    return False
+
+
+async def exchange(reader, writer, method, host, target, user_agent, extra_headers):
+    """
+    Sends a request on a connection and reads the response.
+    """
+    lines = ['{} {} HTTP/1.1'.format(method, target), 'Host: {}'.format(host), 'User-Agent: {}'.format(user_agent),
+             'Accept: */*', 'Connection: keep-alive']
+    lines.extend('{}: {}'.format(key, value) for key, value in extra_headers.items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError('connection closed without response')
+        version, status, reason = (line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        if not version.startswith('HTTP/') or not status.isdigit():
+            raise ValueError('invalid status line {}'.format(line[:100]))
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        # informational responses are followed by the real one
+        if status >= 200:
+            break
+
+    connection = headers.get('connection', '').lower()
+    reusable = (version == 'HTTP/1.1' and connection != 'close') or (version == 'HTTP/1.0' and connection == 'keep-alive')
+    if method != 'HEAD' and status not in (204, 304):
+        reusable = await read_body(reader, headers) and reusable
+    return Response(status, reason, headers, reusable)
+
+
+def is_failure(result):
+    """
+    True if a check result has no response or an error status.
+    """
+    return result['status'] is None or result['status'] >= 400
+
+
+def permanent_target(result):
+    """
+    The url a link permanently moved to (following the permanent redirects, 301 and 308, at the start of the redirects
+    of a check result) or None. Not if the check failed at the end or if a deeper url moved to the root of a site,
+    which mostly means the page is gone (for example parked domains).
+    """
+    if is_failure(result):
+        return None
+    target = None
+    for status, location in result['redirects']:
+        if status not in (301, 308):
+            break
+        target = location
+    if target is None:
+        return None
+    if urllib.parse.urlsplit(target).path.strip('/') == '' and urllib.parse.urlsplit(result['url']).path.strip('/') != '':
+        return None
+    return target
+
+
+class LinkCache:
+    """
+    The last check result of every link, stored in a file with one JSON object per line.
+
+    Working links are only checked again after ttl seconds, failed links (no response or error status) already after
+    failure_ttl seconds. Links checked again are requested with the ETag and Last-Modified of their last result, an
+    unchanged resource is then only confirmed by the server (304). Links not checked or looked up since loading are
+    dropped when saving.
+    """
+
+    def __init__(self, file, ttl=7*24*3600, failure_ttl=24*3600):
+        self.file = file
+        self.ttl = ttl
+        self.failure_ttl = min(failure_ttl, ttl)
+        self.results = {}
+        self.seen = {}
+        if os.path.isfile(file):
+            for line in read_text(file).splitlines():
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # incomplete line of an interrupted run
+                    continue
+                self.results[result['url']] = result
+
+    def lookup(self, url, now):
+        """
+        Returns the last result of the link if it is still valid at the time now, otherwise None.
+        """
+        result = self.results.get(url, None)
+        if result is None or now - result['checked'] >= (self.failure_ttl if is_failure(result) else self.ttl):
+            return None
+        self.seen[url] = result
+        return dict(result, cached=True)
+
+    def store(self, result):
+        self.seen[result['url']] = dict(result)
+
+    def save(self):
+        text = ''.join(json.dumps(self.seen[url], ensure_ascii=False) + '\n' for url in sorted(self.seen))
+        write_text_atomic(self.file, text)
+        self.results = self.seen
+        self.seen = {}
+
+
+class LinkChecker:
+    """
+    Checks links concurrently with at most concurrency requests in flight and at most per_host of them to the same
+    host. Each request may take at most timeout seconds, a failed check is repeated up to retries times, waiting
+    backoff, 2 * backoff, 4 * backoff, .. seconds before.
+
+    run(urls) returns for every url a dictionary with the final status (None if no response), reason, error
+    (None or a description), the final url and the redirects on the way there ([status, location] each), the method
+    of the final request (HEAD or GET), the number of attempts, the seconds it took, the time it was checked (seconds
+    since the epoch), the ETag and Last-Modified of the final response (or None), whether it came from the cache
+    without any request and whether the server confirmed that the resource did not change since the last check.
+    """
+
+    def __init__(self, concurrency=50, per_host=4, timeout=15, retries=2, backoff=1, max_redirects=5,
+                 user_agent=default_user_agent, ssl_context=None, verbose=False):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.verbose = verbose
+        self.pools = {}
+        self.semaphore = None
+        self.number_requests = 0
+        self.number_checked = 0
+
+    def run(self, urls, cache=None):
+        return asyncio.run(self.check_all(urls, cache))
+
+    def number_connections(self):
+        """
+        Number of connections opened in the last run.
+        """
+        return sum(pool.number_opened for pool in self.pools.values())
+
+    async def check_all(self, urls, cache=None):
+        """
+        Checks all urls (each distinct url once, not those with a valid result in the cache) and returns the results in
+        the order of the urls. The results are stored in the cache (which is not saved).
+        """
+        self.pools = {}
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.number_requests = 0
+        self.number_checked = 0
+        now = time.time()
+        results = {}
+        for url in urls:
+            if url not in results:
+                results[url] = cache.lookup(url, now) if cache else None
+        unchecked = [url for url, result in results.items() if result is None]
+        try:
+            checked = await asyncio.gather(*(self.check(url, cache.results.get(url, None) if cache else None) for url in unchecked))
+        finally:
+            for pool in self.pools.values():
+                pool.close()
+        for url, result in zip(unchecked, checked):
+            results[url] = result
+            if cache:
+                cache.store(result)
+        return [results[url] for url in urls]
+
+    async def check(self, url, previous=None):
+        """
+        Checks a single url, repeating failed checks. With the previous result of the url, the final url of it is
+        requested conditionally.
+        """
+        start = time.perf_counter()
+        result = {'url': url, 'status': None, 'reason': None, 'error': None, 'final url': url, 'redirects': [],
+                  'method': None, 'attempts': 0, 'seconds': None, 'checked': None, 'etag': None,
+                  'last modified': None, 'cached': False, 'not modified': False}
+
+        # validators of the last working check
+        conditional = None
+        if previous and not is_failure(previous):
+            headers = {}
+            if previous.get('etag', None):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last modified', None):
+                headers['If-Modified-Since'] = previous['last modified']
+            if headers:
+                conditional = (previous['final url'], headers)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            result['attempts'] = attempt + 1
+            try:
+                response, method, final_url, redirects = await self.follow(url, conditional)
+            except (OSError, EOFError, asyncio.TimeoutError) as e:
+                # connection errors, timeouts, incomplete responses can be temporary
+                result['status'], result['reason'] = None, None
+                result['error'] = '{}: {}'.format(type(e).__name__, e) if str(e) else type(e).__name__
+                continue
+            except (ValueError, RuntimeError) as e:
+                # invalid urls or responses, too many redirects
+                result['error'] = str(e)
+                break
+            result.update({'status': response.status, 'reason': response.reason, 'error': None, 'final url': final_url,
+                           'redirects': redirects, 'method': method, 'etag': response.headers.get('etag', None),
+                           'last modified': response.headers.get('last-modified', None)})
+            if response.status == 304 and conditional and final_url == conditional[0]:
+                # unchanged since the last check
+                result.update({'status': previous['status'], 'reason': previous['reason'], 'not modified': True,
+                               'etag': result['etag'] or previous.get('etag', None),
+                               'last modified': result['last modified'] or previous.get('last modified', None)})
+            if response.status not in retry_statuses:
+                break
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        result['checked'] = int(time.time())
+
+        self.number_checked += 1
+        if self.verbose and self.number_checked % 50 == 0:
+            print('{} links checked'.format(self.number_checked))
+        return result
+
+    async def follow(self, url, conditional=None):
+        """
+        Requests an url (HEAD, then ranged GET if needed), following redirects. Returns the last response, its method,
+        the final url and the redirects. Conditional is None or an url and the headers to add when requesting it.
+        """
+        redirects = []
+        for _ in range(self.max_redirects + 1):
+            headers = conditional[1] if conditional and url == conditional[0] else {}
+            method = 'HEAD'
+            response = await self.request(method, url, headers)
+            if response.status >= 400:
+                # some servers do not support HEAD (properly)
+                method = 'GET'
+                response = await self.request(method, url, dict(headers, Range='bytes=0-0'))
+            if response.status not in redirect_statuses or 'location' not in response.headers:
+                return response, method, url, redirects
+            url = urllib.parse.urljoin(url, response.headers['location'])
+            redirects.append([response.status, url])
+        raise RuntimeError('more than {} redirects'.format(self.max_redirects))
+
+    async def request(self, method, url, extra_headers=None):
+        """
+        A single request on a pooled connection of the host of the url.
+        """
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError('cannot check url {}'.format(url))
+        host = parts.hostname.encode('idna').decode('ascii')
+        port = parts.port or (443 if scheme == 'https' else 80)
+        host_header = host if parts.port is None else '{}:{}'.format(host, parts.port)
+        target = request_target(parts)
+
+        key = (scheme, host, port)
+        pool = self.pools.get(key, None)
+        if pool is None:
+            pool = ConnectionPool(scheme, host, port, self.per_host, self.ssl_context)
+            self.pools[key] = pool
+
+        # the host limit first, so that waiting for a busy host does not block requests to other hosts
+        async with pool.semaphore, self.semaphore:
+            connection = pool.take()
+            reused = connection is not None
+            while True:
+                if connection is None:
+                    connection = await asyncio.wait_for(pool.open(), self.timeout)
+                reader, writer = connection
+                self.number_requests += 1
+                try:
+                    response = await asyncio.wait_for(exchange(reader, writer, method, host_header, target, self.user_agent, extra_headers or {}), self.timeout)
+                except asyncio.TimeoutError:
+                    writer.close()
+                    raise
+                except (OSError, EOFError):
+                    writer.close()
+                    # the server may have closed an idle connection in the meantime, then try a new one
+                    if reused:
+                        connection, reused = None, False
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if response.reusable:
+                    pool.idle.append(connection)
+                else:
+                    writer.close()
+                return response
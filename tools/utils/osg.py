@@ -3,30 +3,178 @@ Specific functions working on the games.
 """
 
 import re
+import json
+import math
+import hashlib
+import pickle
+import operator
+import urllib.parse
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 from utils.utils import *
 
 essential_fields = ('Home', 'State', 'Keywords', 'Code repository', 'Code language', 'Code license')
 valid_fields = ('Home', 'Media', 'State', 'Play', 'Download', 'Platform', 'Keywords', 'Code repository', 'Code language',
 'Code license', 'Code dependencies', 'Assets license', 'Build system', 'Build instructions')
+valid_fields_index = {field: index for index, field in enumerate(valid_fields)}
 valid_platforms = ('Windows', 'Linux', 'macOS', 'Android', 'iOS', 'Web')
 recommended_keywords = ('action', 'arcade', 'adventure', 'visual novel', 'sports', 'platform', 'puzzle', 'role playing', 'simulation', 'strategy', 'card game', 'board game', 'music', 'educational', 'tool', 'game engine', 'framework', 'library', 'remake')
 regex_sanitize_name = re.compile(r"[^A-Za-z 0-9-]+")
 regex_sanitize_name_space_eater = re.compile(r" +")
+regex_parenthesis = re.compile(r"\([^)]*\)")
+# urls end at white space, brackets, quotes or commas, but may contain balanced parentheses (wikipedia)
+regex_url = re.compile(r"(?:https?|git|svn)://[^\s<>\[\]\"',()]+(?:\([^\s<>()]*\)[^\s<>\[\]\"',()]*)*")
+default_parse_cache_file = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'parse_cache.pickle')
+default_catalog_snapshot_file = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'catalog_snapshot.pickle')
 
 
 def game_name_similarity(a, b):
     return SequenceMatcher(None, str.casefold(a), str.casefold(b)).ratio()
 
 
+def name_bigrams(name):
+    """
+    List of the character bigrams of a (casefolded) name, repeated ones repeated.
+    """
+    return [name[i:i+2] for i in range(len(name) - 1)]
+
+
+def shared_bigrams_bound(length_a, length_b, threshold):
+    """
+    Lower bound of the number of shared bigrams (in name_bigrams, counted with repetitions) of two names of these
+    lengths with a similarity above the threshold.
+
+    The similarity is 2M / n with n the sum of the lengths and M the number of characters in the k matching blocks.
+    Each block of length L gives L - 1 shared bigrams, so at least M - k are shared. Two consecutive blocks are
+    separated by at least one of the n - 2M unmatched characters, so k <= n - 2M + 1 and at least 3M - n - 1 bigrams
+    are shared. Zero or less means that the bigrams cannot exclude any name of that length.
+    """
+    n = length_a + length_b
+    # smallest number of matched characters giving a similarity above the threshold (a bit less against rounding)
+    matched = math.floor(threshold * n / 2 - 1e-9) + 1
+    return 3 * matched - n - 1
+
+
+class FuzzyNameIndex:
+    """
+    Finds names similar to a given name without comparing it to all names.
+
+    Casefolded names are bucketed by their character bigrams. For a lookup, the number of bigrams shared with the given
+    name is counted for all names sharing at least one and only for the names that share at least as many as a name
+    with a similarity above the threshold must (see shared_bigrams_bound) the similarity (same as
+    game_name_similarity(name, candidate)) is computed, after cheaper upper bounds of it. Where the bound cannot exclude
+    anything (short names, low thresholds) all names of that length are compared, so the results are the same as
+    comparing with all names. With a limit only the limit many names sharing most bigrams are considered, which is
+    faster but may miss matches.
+    """
+
+    def __init__(self, names, limit=None):
+        self.names = list(names)
+        self.keys = [str.casefold(x) for x in self.names]
+        self.limit = limit
+        self.buckets = {}
+        self.lengths = {}
+        for index, key in enumerate(self.keys):
+            for bigram in name_bigrams(key):
+                self.buckets.setdefault(bigram, []).append(index)
+            self.lengths.setdefault(len(key), []).append(index)
+
+    def lookup(self, name, threshold):
+        """
+        Returns (name, similarity) for all names with a similarity above the threshold, most similar first.
+        """
+        key = str.casefold(name)
+        keys = self.keys
+
+        # minimal number of shared bigrams by length of the other name, names of lengths that cannot be excluded
+        bounds = {}
+        candidates = []
+        for length, indices in self.lengths.items():
+            # upper bound of the similarity from the lengths alone
+            if 2 * min(len(key), length) <= threshold * (len(key) + length):
+                continue
+            bound = shared_bigrams_bound(len(key), length, threshold)
+            if bound > 0 or self.limit:
+                bounds[length] = bound
+            else:
+                candidates.extend(indices)
+
+        # count shared bigrams (with repetitions, the products of the numbers of occurrences, at least the bound)
+        counts = Counter()
+        buckets = self.buckets
+        for bigram in name_bigrams(key):
+            bucket = buckets.get(bigram, None)
+            if bucket:
+                counts.update(bucket)
+        for index, count in counts.most_common(self.limit) if self.limit else counts.items():
+            bound = bounds.get(len(keys[index]), None)
+            if bound is not None and count >= bound:
+                candidates.append(index)
+
+        # compute similarity only for the candidates
+        matches = []
+        matcher = SequenceMatcher(None, key)
+        for index in candidates:
+            matcher.set_seq2(keys[index])
+            if matcher.real_quick_ratio() > threshold and matcher.quick_ratio() > threshold:
+                ratio = matcher.ratio()
+                if ratio > threshold:
+                    matches.append((self.names[index], ratio))
+        matches.sort(key=lambda x: x[1], reverse=True)
+        return matches
+
+    def lookup_chunk(self, names, threshold):
+        return [self.lookup(name, threshold) for name in names]
+
+    def lookup_all(self, names, threshold, jobs=1):
+        """
+        Like lookup for each of the names, returns the lists of matches in the same order.
+
+        With jobs > 1 the names are looked up in chunks by a pool of that many processes (jobs = 0 uses all CPUs).
+        """
+        names = list(names)
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        if jobs == 1 or len(names) < 2:
+            return self.lookup_chunk(names, threshold)
+
+        # every chunk carries a copy of the index, so not too many chunks
+        chunk_size = max(1, -(-len(names) // (jobs * 4)))
+        chunks = [names[i:i+chunk_size] for i in range(0, len(names), chunk_size)]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for chunk_results in executor.map(self.lookup_chunk, chunks, [threshold] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+
+
+def entry_names(games_path):
+    """
+    Returns the file names of all entries (ignores everything starting with underscore).
+    """
+    return [x for x in os.listdir(games_path) if not x.startswith('_')]
+
+
+def entry_stamps(games_path):
+    """
+    Returns the modification times (in ns) of all entries by file name.
+    """
+    with os.scandir(games_path) as entries:
+        return {x.name: x.stat().st_mtime_ns for x in entries if not x.name.startswith('_')}
+
+
 def entry_iterator(games_path):
     """
 
     """
 
-    # get all entries (ignore everything starting with underscore)
-    entries = os.listdir(games_path)
-    entries = (x for x in entries if not x.startswith('_'))
+    # get all entries
+    entries = entry_names(games_path)
 
     # iterate over all entries
     for entry in entries:
@@ -39,6 +187,52 @@ def entry_iterator(games_path):
         yield entry, entry_path, content
 
 
+def is_git_entry_path(path):
+    """
+    True for paths (relative to the repository) of entries in the games folder, see entry_names().
+    """
+    folder, _, entry = path.partition('/')
+    return folder == 'games' and entry != '' and '/' not in entry and not entry.startswith('_')
+
+
+def git_entry_blobs(repository_path, revision):
+    """
+    Returns the blob hashes of all entries of a git revision by path (sorted by path).
+    """
+    blobs = {}
+    for line in git_output(repository_path, '-c', 'core.quotepath=off', 'ls-tree', revision, 'games/').splitlines():
+        meta, path = line.split('\t', 1)
+        if is_git_entry_path(path):
+            blobs[path] = meta.split()[2]
+    return blobs
+
+
+def git_entry_iterator(repository_path, revision):
+    """
+    Like entry_iterator(), but for the entries of a git revision, which are read without a checkout through a single
+    git cat-file process. Yields (entry, "revision:path", content) and can be given to assemble_infos().
+    """
+    blobs = git_entry_blobs(repository_path, revision)
+    with GitObjectReader(repository_path) as reader:
+        for path, blob in blobs.items():
+            yield path.partition('/')[2], '{}:{}'.format(revision, path), reader.read_text(blob)
+
+
+def git_entry_changes(repository_path, old_revision, new_revision):
+    """
+    Returns (entry, old blob, new blob) for all entries that differ between two git revisions, the old blob is None
+    for added entries, the new blob None for removed entries.
+    """
+    changes = []
+    for line in git_output(repository_path, '-c', 'core.quotepath=off', 'diff', '--raw', '--no-abbrev', '--no-renames', old_revision, new_revision, '--', 'games/').splitlines():
+        # :old mode, new mode, old blob, new blob, status <tab> path
+        meta, path = line.split('\t', 1)
+        if is_git_entry_path(path):
+            meta = meta.split()
+            changes.append((path.partition('/')[2], None if meta[4] == 'A' else meta[2], None if meta[4] == 'D' else meta[3]))
+    return changes
+
+
 def derive_canonical_file_name(name):
     """
     Derives a canonical file name from a game name
@@ -51,58 +245,192 @@ def derive_canonical_file_name(name):
     return name
 
 
-def parse_entry(content):
+# shared table of all tag strings (keywords, licenses, languages, ..), each distinct value is only stored once
+tag_intern_table = {}
+
+
+def intern_tags(values):
     """
-    Returns a dictionary of the features of the content
+    Returns the values as tuple of shared strings from the tag intern table.
     """
+    return tuple([tag_intern_table.setdefault(x, x) for x in values])
 
-    info = {}
 
-    # read name
-    regex = re.compile(r"^# (.*)") # start of content, starting with "# " and then everything until the end of line
-    matches = regex.findall(content)
-    if len(matches) != 1 or not matches[0]:
+class GameEntry(Mapping):
+    """
+    A parsed entry with a fixed set of attributes. Field values are tuples of interned strings.
+
+    Can be used like the (read-only) info dictionary returned by parse_entry before, i.e. with the keys 'name',
+    'description', 'file', 'inactive' and for every field, e.g. 'code language' and 'code language-raw'. Fields that
+    are not given (or empty) are not contained.
+    """
+
+    # dictionary keys and the attributes they are stored in
+    keys_attributes = {'name': 'name', 'description': 'description', 'file': 'file', 'inactive': 'inactive'}
+    for field in valid_fields:
+        keys_attributes[field.lower()] = field.lower().replace(' ', '_')
+        keys_attributes[field.lower() + '-raw'] = field.lower().replace(' ', '_') + '_raw'
+    tag_attributes = tuple(field.lower().replace(' ', '_') for field in valid_fields)
+    del field
+
+    __slots__ = tuple(keys_attributes.values())
+
+    def __init__(self, info):
+        """
+        Takes the values from an info dictionary, fields become tuples of interned strings.
+        """
+        for key, attribute in self.keys_attributes.items():
+            value = info.get(key, None)
+            if value is not None and attribute in self.tag_attributes:
+                value = intern_tags(value)
+            setattr(self, attribute, value)
+
+    @classmethod
+    def getter(cls, *keys):
+        """
+        Returns a function giving the values of the keys of an entry (None for those not contained) as tuple, in a
+        single call. Much faster than item access when going over many entries.
+        """
+        return operator.attrgetter(*(cls.keys_attributes[key] for key in keys))
+
+    def __getitem__(self, key):
+        value = getattr(self, self.keys_attributes[key])
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        attribute = self.keys_attributes.get(key, None)
+        return attribute is not None and getattr(self, attribute) is not None
+
+    def get(self, key, default=None):
+        attribute = self.keys_attributes.get(key, None)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return default if value is None else value
+
+    def __iter__(self):
+        return (key for key, attribute in self.keys_attributes.items() if getattr(self, attribute) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return 'GameEntry({})'.format(dict(self.items()))
+
+    def __getstate__(self):
+        return tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    def __setstate__(self, state):
+        # tags are interned again after unpickling (parse cache, parsing in other processes)
+        for attribute, value in zip(self.__slots__, state):
+            if value is not None and attribute in self.tag_attributes:
+                value = intern_tags(value)
+            setattr(self, attribute, value)
+
+    @classmethod
+    def to_columns(cls, entries):
+        """
+        The values of all attributes of many entries as one list per attribute (in the order of __slots__).
+        """
+        return [list(map(operator.attrgetter(attribute), entries)) for attribute in cls.__slots__]
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Entries from the lists of to_columns(). Much faster than unpickling the entries one by one, because the
+        attributes are set column by column without Python code per entry. Tags are not interned again, pickling
+        keeps identical strings identical.
+        """
+        entries = [cls.__new__(cls) for _ in range(len(columns[0]) if columns else 0)]
+        for attribute, column in zip(cls.__slots__, columns):
+            deque(map(getattr(cls, attribute).__set__, entries, column), maxlen=0)
+        return entries
+
+
+def tokenize_entry(content):
+    """
+    Reads an entry once, line by line, and returns its name, its description and the list of (field, value) pairs
+    in the order they appear.
+
+    Fields are lines starting with "- ", the field name is everything until the first ": ", the value is the rest
+    of the line.
+    """
+
+    lines = content.split('\n')
+
+    # name (first line, starting with "# ")
+    name = lines[0][2:] if lines[0].startswith('# ') else None
+    if not name:
         raise RuntimeError('Name not found in entry "{}"'.format(content))
-    info['name'] = matches[0]
 
-    # read description
-    regex = re.compile(r"^.*\n\n_(.*)_\n") # third line from top, everything between underscores
-    matches = regex.findall(content)
-    if len(matches) != 1 or not matches[0]:
+    # description (third line from top, everything between underscores, second line must be empty)
+    description = None
+    if len(lines) > 3 and not lines[1]:
+        line = lines[2]
+        if len(line) > 2 and line[0] == '_' and line[-1] == '_':
+            description = line[1:-1]
+    if not description:
         raise RuntimeError('Description not found in entry "{}"'.format(content))
-    info['description'] = matches[0]
 
-    # first read all field names
-    regex = re.compile(r"^- (.*?): ", re.MULTILINE) # start of each line having "- ", then everything until a colon, then ": "
-    fields = regex.findall(content)
+    # fields
+    fields = []
+    for line in lines:
+        if line.startswith('- '):
+            index = line.find(': ', 2)
+            if index >= 0:
+                fields.append((line[2:index], line[index+2:]))
+
+    return name, description, fields
+
+
+def parse_entry(content):
+    """
+    Returns a GameEntry with the features of the content
+    """
+    return GameEntry(parse_entry_as_dict(content))
+
+
+def parse_entry_as_dict(content):
+    """
+    Returns a dictionary of the features of the content
+    """
+
+    info = {}
+
+    # tokenize (name, description and fields in one pass)
+    name, description, fields = tokenize_entry(content)
+    info['name'] = name
+    info['description'] = description
 
     # check that essential fields are there
+    field_names = [field for field, _ in fields]
     for field in essential_fields:
-        if field not in fields:
+        if field not in field_names:
             raise RuntimeError('Essential field "{}" missing in entry "{}"'.format(field, info['name']))
 
     # check that all fields are valid fields and are existing in that order
     index = 0
-    for field in fields:
-        while index < len(valid_fields) and field != valid_fields[index]:
-            index += 1
-        if index == len(valid_fields):
+    for field in field_names:
+        field_index = valid_fields_index.get(field, -1)
+        if field_index < index:
             raise RuntimeError('Field "{}" in entry "{}" either misspelled or in wrong order'.format(field, info['name']))
+        index = field_index
+
+    # every field should only be present once
+    if len(set(field_names)) != len(field_names):
+        field = next(field for field in field_names if field_names.count(field) > 1)
+        raise RuntimeError('Field "{}" in entry "{}" exist multiple times.'.format(field, info['name']))
 
     # iterate over found fields
-    for field in fields:
-        regex = re.compile(r"- {}: (.*)".format(field))
-        matches = regex.findall(content)
-        if len(matches) != 1:
-            # every field should only be present once
-            raise RuntimeError('Field "{}" in entry "{}" exist multiple times.'.format(field, info['name']))
-        v = matches[0]
+    for field, v in fields:
 
         # first store as is
         info[field.lower()+'-raw'] = v
 
         # remove parenthesis with content
-        v = re.sub(r'\([^)]*\)', '', v)
+        v = regex_parenthesis.sub('', v)
 
         # split on ','
         v = v.split(',')
@@ -114,7 +442,7 @@ def parse_entry(content):
         v = [x for x in v if x]
 
         # if entry is of structure <..> remove <>
-        v = [x[1:-1] if x[0] is '<' and x[-1] is '>' else x for x in v]
+        v = [x[1:-1] if x[0] == '<' and x[-1] == '>' else x for x in v]
 
         # empty fields will not be stored
         if not v:
@@ -190,26 +518,302 @@ def parse_entry(content):
     return info
 
 
-def assemble_infos(games_path):
+def parser_hash():
+    """
+    Hash of the parsing code (this file), persistent caches of parsed entries are dropped if it changed.
+    """
+    with open(__file__, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed entries stored in a pickle file.
+
+    Maps each entry file name to its size and modification time, the hash of its content and the parsed info. An entry
+    is only parsed again if size or modification time changed and the content hash differs too. The whole cache is
+    dropped if the parsing code (this file) changed.
+    """
+
+    version = 1
+
+    def __init__(self, file):
+        self.file = file
+        self.parser_hash = parser_hash()
+        self.entries = {}
+        self.seen = {}
+        self.pending = {}
+        self.modified = False
+        if os.path.isfile(file):
+            try:
+                with open(file, 'rb') as f:
+                    version, stored_hash, entries = pickle.load(f)
+            except Exception:
+                print('parse cache {} unreadable, will rebuild it'.format(file))
+            else:
+                if version == self.version and stored_hash == self.parser_hash:
+                    self.entries = entries
+
+    def lookup(self, entry, entry_path):
+        """
+        Returns the cached info (or None) and the content of the entry (or None if it did not need to be read).
+        """
+        stat = os.stat(entry_path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        cached = self.entries.get(entry)
+
+        # unchanged size and modification time
+        if cached and cached[0] == stamp:
+            self.seen[entry] = cached
+            return cached[2], None
+
+        # changed size or modification time, but maybe the same content
+        content = read_text(entry_path)
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        if cached and cached[1] == digest:
+            self.seen[entry] = (stamp, digest, cached[2])
+            self.modified = True
+            return cached[2], content
+
+        self.pending[entry] = (stamp, digest)
+        return None, content
+
+    def lookup_content(self, entry, content):
+        """
+        Returns the cached info (or None) for an entry whose content was already read.
+        """
+        cached = self.entries.get(entry)
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        if cached and cached[1] == digest:
+            self.seen[entry] = cached
+            return cached[2]
+
+        # the modification time is unknown, the next lookup will compare the content hash
+        self.pending[entry] = (None, digest)
+        return None
+
+    def store(self, entry, info):
+        """
+        Stores a freshly parsed entry (after an unsuccessful lookup).
+        """
+        stamp, digest = self.pending.pop(entry)
+        self.seen[entry] = (stamp, digest, info)
+        self.modified = True
+
+    def save(self):
+        """
+        Writes all entries seen since loading (cache entries of deleted files are thereby evicted).
+        """
+        if not self.modified and self.seen.keys() == self.entries.keys():
+            return
+        write_pickle_atomic(self.file, (self.version, self.parser_hash, self.seen))
+        self.entries = self.seen
+        self.seen = {}
+        self.modified = False
+
+
+class BlobCache:
+    """
+    Persistent cache of parsed entries of a git repository, stored in a pickle file.
+
+    Maps the git hash of each entry blob to the parsed info or None if the entry could not be parsed. Blobs never
+    change, so only the whole cache is dropped if the parsing code (this file) changed.
+    """
+
+    version = 1
+
+    def __init__(self, file):
+        self.file = file
+        self.parser_hash = parser_hash()
+        self.blobs = {}
+        self.modified = False
+        if os.path.isfile(file):
+            try:
+                with open(file, 'rb') as f:
+                    version, stored_hash, blobs = pickle.load(f)
+            except Exception:
+                print('blob cache {} unreadable, will rebuild it'.format(file))
+            else:
+                if version == self.version and stored_hash == self.parser_hash:
+                    self.blobs = blobs
+
+    def parse(self, blob, reader):
+        """
+        Returns the info of an entry blob (None if it cannot be parsed), the blob is only read (through a
+        GitObjectReader) and parsed if not cached.
+        """
+        if blob in self.blobs:
+            return self.blobs[blob]
+        try:
+            info = parse_entry(reader.read_text(blob))
+        except Exception:
+            # older entries may not follow the current format
+            info = None
+        self.blobs[blob] = info
+        self.modified = True
+        return info
+
+    def save(self):
+        if not self.modified:
+            return
+        write_pickle_atomic(self.file, (self.version, self.parser_hash, self.blobs))
+        self.modified = False
+
+
+class CatalogSnapshot:
+    """
+    The parsed entries of the games folder at one point in time, stored in a pickle file by maintenance.py so that
+    other tools can start without parsing.
+
+    Holds the infos (stored column wise, see GameEntry.to_columns), the modification times of all entries when they
+    were parsed and indexes of the infos by name and by file name. A snapshot is stale if any entry was changed, added
+    or deleted since (see is_fresh).
+    """
+
+    version = 1
+
+    def __init__(self, infos, stamps):
+        self.infos = infos
+        self.stamps = stamps
+        self.names = {info['name']: index for index, info in enumerate(infos)}
+        self.files = {info['file']: index for index, info in enumerate(infos)}
+
+    @classmethod
+    def load(cls, file):
+        """
+        Returns the snapshot stored in a file or None if there is none or it was written by other parsing code.
+        """
+        if not os.path.isfile(file):
+            return None
+        try:
+            with open(file, 'rb') as f:
+                version, stored_hash, stamps, columns, names, files = pickle.load(f)
+        except Exception:
+            print('catalog snapshot {} unreadable, ignoring it'.format(file))
+            return None
+        if version != cls.version or stored_hash != parser_hash():
+            return None
+        snapshot = cls.__new__(cls)
+        snapshot.infos = GameEntry.from_columns(columns)
+        snapshot.stamps = stamps
+        snapshot.names = names
+        snapshot.files = files
+        return snapshot
+
+    def save(self, file):
+        write_pickle_atomic(file, (self.version, parser_hash(), self.stamps, GameEntry.to_columns(self.infos), self.names, self.files))
+
+    def is_fresh(self, games_path):
+        """
+        True if no entry in the games path was changed, added or deleted since the snapshot was taken.
+        """
+        return entry_stamps(games_path) == self.stamps
+
+    def by_name(self, name):
+        """
+        The info of the entry with that name or None.
+        """
+        index = self.names.get(name, None)
+        return None if index is None else self.infos[index]
+
+    def by_file(self, file):
+        """
+        The info of the entry with that file name or None.
+        """
+        index = self.files.get(file, None)
+        return None if index is None else self.infos[index]
+
+
+def parse_entries_chunk(chunk):
+    """
+    Parses a list of (entry, content) pairs. Errors name the entry file that failed.
+    """
+    infos = []
+    for entry, content in chunk:
+        try:
+            info = parse_entry(content)
+        except Exception as e:
+            raise RuntimeError('{}: {}'.format(entry, str(e) or type(e).__name__)) from e
+
+        # add file information
+        info.file = entry
+
+        infos.append(info)
+    return infos
+
+
+def parse_entries(entries, jobs=1):
+    """
+    Parses a list of (entry, content) pairs and returns the infos in the same order.
+
+    With jobs > 1 the entries are parsed in chunks by a pool of that many processes (jobs = 0 uses all CPUs).
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(entries) < 2:
+        return parse_entries_chunk(entries)
+
+    # a few chunks per process to balance the load, but not too small to keep the inter process overhead low
+    chunk_size = max(1, min(500, len(entries) // (jobs * 4)))
+    chunks = [entries[i:i+chunk_size] for i in range(0, len(entries), chunk_size)]
+
+    infos = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk_infos in executor.map(parse_entries_chunk, chunks):
+            infos.extend(chunk_infos)
+    return infos
+
+
+def assemble_infos(games_path, cache_file=None, jobs=1, entries=None):
     """
     Parses all entries and assembles interesting infos about them.
+
+    If a cache file is given (for example default_parse_cache_file), only new or changed entries are parsed. With
+    jobs > 1 (or 0 for all CPUs), entries are parsed by a process pool. The order is the order of entry_names().
+
+    Entries that were already read can be given as iterable of (entry, entry path, content) like from
+    entry_iterator(), then the games path is not read.
     """
 
     print('assemble game infos')
 
+    cache = ParseCache(cache_file) if cache_file else None
+
     # a database of all important infos about the entries
     infos = []
 
-    # iterate over all entries
-    for entry, _, content in entry_iterator(games_path):
+    # take entries from the cache, read all others
+    unparsed = []
+    if entries is None:
+        for entry in entry_names(games_path):
+            entry_path = os.path.join(games_path, entry)
+            if cache:
+                info, content = cache.lookup(entry, entry_path)
+            else:
+                info, content = None, read_text(entry_path)
+            if info is None:
+                unparsed.append((len(infos), entry, content))
+            infos.append(info)
+    else:
+        for entry, _, content in entries:
+            info = cache.lookup_content(entry, content) if cache else None
+            if info is None:
+                unparsed.append((len(infos), entry, content))
+            infos.append(info)
 
-        # parse entry
-        info = parse_entry(content)
+    # parse the others
+    parsed = parse_entries([(entry, content) for _, entry, content in unparsed], jobs)
+    for (index, entry, _), info in zip(unparsed, parsed):
+        infos[index] = info
+        if cache:
+            cache.store(entry, info)
 
-        # add file information
-        info['file'] = entry
+    if cache:
+        cache.save()
 
-        # check canonical file name
+    # check canonical file names
+    for info in infos:
+        entry = info['file']
         canonical_file_name = derive_canonical_file_name(info['name'])
         # we also allow -X with X =2..9 as possible extension (because of duplicate canonical file names)
         if canonical_file_name != entry and canonical_file_name != entry[:-5] + '.md':
@@ -220,7 +824,423 @@ def assemble_infos(games_path):
                 pass
                 # os.rename(source_file, target_file)
 
-        # add to list
-        infos.append(info)
+    return infos
+
+
+def extract_urls(text):
+    """
+    Returns all http, https, git and svn urls in a text (fields and free text of an entry), without trailing
+    punctuation.
+    """
+    return [url.rstrip('.;:!?') for url in regex_url.findall(text)]
+
+
+def replace_urls(text, replacements):
+    """
+    Replaces all urls in a text (as found by extract_urls) that are keys of the replacements by their values.
+    """
+    def replace(match):
+        url = match.group(0)
+        stripped = url.rstrip('.;:!?')
+        return replacements.get(stripped, stripped) + url[len(stripped):]
+    return regex_url.sub(replace, text)
+
+
+# default ports of the url schemes
+default_ports = {'http': 80, 'https': 443, 'git': 9418, 'svn': 3690}
+
+
+def canonical_url(url):
+    """
+    The canonical form of an url, the same for variants of an url leading to the same resource: http, https and git
+    become https, host in lower case without www. and default port, no trailing slash, no .git suffix, no fragment,
+    sourceforge variants (sf.net, /p/ and /projects/, .sourceforge.io and .sourceforge.net) unified.
+    """
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme in ('http', 'git'):
+        scheme = 'https'
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-4].rstrip('/')
+
+    # sourceforge
+    if host == 'sf.net':
+        host = 'sourceforge.net'
+    if host == 'sourceforge.net' and path.startswith('/p/'):
+        path = '/projects/' + path[3:]
+    if host.endswith('.sourceforge.io'):
+        host = host[:-3] + '.net'
+
+    # default port removed (a malformed port is kept as written)
+    try:
+        port = parts.port
+    except ValueError:
+        port = parts.netloc.rpartition(':')[2]
+    netloc = host
+    if port and port != default_ports.get(parts.scheme.lower(), None):
+        netloc += ':{}'.format(port)
+    return urllib.parse.urlunsplit((scheme, netloc, path, parts.query, ''))
+
+
+class UrlIndex:
+    """
+    All urls in the entries by their canonical form, with the variants of each (as written in the entries) and the
+    entries containing them, so that each url needs to be checked or mirrored only once and the results can be
+    reported for all entries containing it.
+    """
+
+    def __init__(self):
+        self.variants = {}
+        self.entries = {}
+
+    @classmethod
+    def build(cls, entries):
+        """
+        Builds the index from (entry, entry path, content) like from entry_iterator().
+        """
+        index = cls()
+        for entry, _, content in entries:
+            index.add(entry, content)
+        return index
+
+    def add(self, entry, content):
+        for url in extract_urls(content):
+            key = canonical_url(url)
+            variants = self.variants.setdefault(key, [])
+            if url not in variants:
+                variants.append(url)
+            entries = self.entries.setdefault(key, [])
+            if entry not in entries:
+                entries.append(entry)
+
+    def __len__(self):
+        return len(self.variants)
+
+    def __iter__(self):
+        return iter(self.variants)
+
+    def representative(self, key):
+        """
+        The variant of a canonical url to check: https before http before others, then the shortest.
+        """
+        order = {'https': 0, 'http': 1}
+        return min(self.variants[key], key=lambda x: (order.get(x.split(':', 1)[0].lower(), 2), len(x), x))
+
+
+class Catalog:
+    """
+    The entries of a repository (root path with the games folder, template.md, docs, ..) and indexes derived from
+    them, for running several tools or stages on one instance.
+
+    The entries are only parsed (or taken from a fresh catalog snapshot file) on first access, with the parse cache
+    file and the number of parsing processes given here. Indexes are built on first use and kept until the entries
+    are replaced.
+    """
+
+    def __init__(self, root_path, cache_file=None, jobs=1, snapshot_file=None):
+        self.root_path = root_path
+        self.games_path = os.path.join(root_path, 'games')
+        self.cache_file = cache_file
+        self.jobs = jobs
+        self.snapshot_file = snapshot_file
+        self.snapshot = None
+        self.indexes = {}
+
+    @property
+    def infos(self):
+        """
+        The infos of all entries (parsed on first access).
+        """
+        return self.load().infos
+
+    def load(self):
+        """
+        Returns the snapshot of the entries, loading or parsing them if not done yet.
+        """
+        if self.snapshot is None:
+            snapshot = CatalogSnapshot.load(self.snapshot_file) if self.snapshot_file else None
+            if snapshot and snapshot.is_fresh(self.games_path):
+                self.snapshot = snapshot
+            else:
+                self.parse()
+        return self.snapshot
+
+    def parse(self, entries=None):
+        """
+        Parses all entries (or the given ones, see assemble_infos) and replaces the infos by them.
+        """
+        stamps = entry_stamps(self.games_path)
+        self.update(assemble_infos(self.games_path, self.cache_file, self.jobs, entries), stamps)
+
+    def update(self, infos, stamps=None):
+        """
+        Replaces the infos (for example after some entries changed) and drops all indexes. The stamps are the
+        modification times of the entries the infos were parsed from (default is the current ones).
+        """
+        self.snapshot = CatalogSnapshot(infos, entry_stamps(self.games_path) if stamps is None else stamps)
+        self.indexes = {}
+
+    def save_snapshot(self, file=default_catalog_snapshot_file):
+        self.load().save(file)
+
+    def by_name(self, name):
+        """
+        The info of the entry with that name or None.
+        """
+        return self.load().by_name(name)
+
+    def by_file(self, file):
+        """
+        The info of the entry with that file name or None.
+        """
+        return self.load().by_file(file)
+
+    def with_value(self, key, value):
+        """
+        The infos of all entries having a value in a multi-valued field (e.g. 'keywords') in the order of the infos.
+        The index of that field is built on first use.
+        """
+        index = self.indexes.get(key, None)
+        if index is None:
+            index = {}
+            for info in self.infos:
+                # each info only once, even if a value is repeated in the entry
+                for x in dict.fromkeys(info.get(key, ())):
+                    index.setdefault(x, []).append(info)
+            self.indexes[key] = index
+        return index.get(value, [])
+
+    def by_keyword(self, keyword):
+        """
+        The infos of all entries with that keyword.
+        """
+        return self.with_value('keywords', keyword)
+
+    def by_repository(self, url):
+        """
+        The infos of all entries with that code repository url (as given in the entry, without comment).
+        """
+        return self.with_value('code repository', url)
+
+    def url_index(self):
+        """
+        The UrlIndex of all urls in the entry files (read once on first use).
+        """
+        index = self.indexes.get('urls', None)
+        if index is None:
+            index = UrlIndex.build(entry_iterator(self.games_path))
+            self.indexes['urls'] = index
+        return index
+
+
+# multi-valued fields that are stored as facet columns
+facet_fields = ('state', 'platform', 'keywords', 'code language', 'code license', 'code dependencies', 'assets license', 'build system')
+
+
+class FacetColumn:
+    """
+    A multi-valued field of all entries, dictionary encoded.
+
+    The distinct values are in vocabulary (in order of first occurrence), codes holds for all entries one after another
+    the positions of their values in the vocabulary and the codes of entry i are codes[offsets[i]:offsets[i+1]].
+    """
+
+    __slots__ = ('vocabulary', 'codes', 'offsets')
+
+    def __init__(self, infos, key):
+        self.vocabulary = []
+        self.codes = array('l')
+        self.offsets = array('l', [0])
+        index = {}
+        for info in infos:
+            for value in info.get(key, ()):
+                code = index.get(value, None)
+                if code is None:
+                    code = index[value] = len(self.vocabulary)
+                    self.vocabulary.append(value)
+                self.codes.append(code)
+            self.offsets.append(len(self.codes))
+
+    def postings(self):
+        """
+        Returns for every value of the vocabulary the sorted list of entries (as row indices) having it.
+        """
+        postings = [[] for _ in self.vocabulary]
+        codes, offsets = self.codes, self.offsets
+        for row in range(len(offsets) - 1):
+            for code in codes[offsets[row]:offsets[row+1]]:
+                posting = postings[code]
+                if not posting or posting[-1] != row:
+                    posting.append(row)
+        return postings
+
+
+class ColumnarCatalog:
+    """
+    Column view of the parsed entries: the names and for each facet field a FacetColumn. Rows are in the order of the
+    entries.
+    """
+
+    def __init__(self, infos, fields=facet_fields):
+        self.names = [info['name'] for info in infos]
+        self.columns = {field: FacetColumn(infos, field) for field in fields}
+
+    def __len__(self):
+        return len(self.names)
+
+
+def intersect_postings(a, b):
+    """
+    Intersection of two sorted lists of entry ids.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    index = 0
+    for x in a:
+        index = bisect_left(b, x, index)
+        if index == len(b):
+            break
+        if b[index] == x:
+            result.append(x)
+    return result
+
+
+class FacetIndex:
+    """
+    Inverted index of the facet fields of all entries: for every value of every field the sorted list of ids of the
+    entries having it. Entry ids are positions in the list of (file, name) of all entries sorted by file name.
+
+    Is stored as json file (docs/facets.json) and answers queries without parsing the entries.
+    """
+
+    version = 1
+    fields = ('keywords', 'code language', 'code license', 'code dependencies', 'platform', 'state', 'build system')
+
+    def __init__(self, entries, postings):
+        self.entries = entries
+        self.postings = postings
+
+    @classmethod
+    def build(cls, infos):
+        """
+        Builds the index from parsed entries.
+        """
+        infos = sorted(infos, key=lambda x: x['file'])
+        catalog = ColumnarCatalog(infos, cls.fields)
+        postings = {field: dict(zip(column.vocabulary, column.postings())) for field, column in catalog.columns.items()}
+        return cls([(info['file'], info['name']) for info in infos], postings)
+
+    @classmethod
+    def load(cls, file):
+        data = json.loads(read_text(file))
+        if data['version'] != cls.version:
+            raise RuntimeError('Facet index {} has version {}, expected {}'.format(file, data['version'], cls.version))
+        return cls([tuple(x) for x in data['entries']], data['facets'])
+
+    def save(self, file):
+        data = {'version': self.version, 'entries': self.entries, 'facets': self.postings}
+        write_text_if_changed(file, json.dumps(data, separators=(',', ':'), sort_keys=True))
+
+    def lookup(self, field, value):
+        """
+        Sorted ids of all entries having this value in this field.
+        """
+        if field not in self.postings:
+            raise RuntimeError('Field "{}" not in the facet index (only {})'.format(field, ', '.join(self.fields)))
+        return self.postings[field].get(value, [])
+
+    def query(self, terms):
+        """
+        Sorted ids of all entries matching all terms. Each term is (field, values, negated) and matches entries having
+        any of the values in the field (or none of them if negated).
+        """
+        # positive terms first, starting with the shortest posting list
+        positive = []
+        negative = set()
+        for field, values, negated in terms:
+            ids = set()
+            for value in values:
+                ids.update(self.lookup(field, value))
+            if negated:
+                negative |= ids
+            else:
+                positive.append(sorted(ids))
+        positive.sort(key=len)
+
+        result = positive[0] if positive else list(range(len(self.entries)))
+        for ids in positive[1:]:
+            result = intersect_postings(result, ids)
+        return [x for x in result if x not in negative]
+
+
+class SearchIndex:
+    """
+    Index for substring search in the rows of a table (for the web page): for every substring of length 3 (trigram) of
+    the lower case text of the rows the sorted list of ids of the rows containing it.
+
+    For a word of 3 characters the rows are looked up directly. For longer words the rows containing all its trigrams
+    are the candidates, which are then checked with the text itself. Shorter words are searched in all texts (they
+    would match most rows anyway). All give exactly the rows containing the word.
+
+    Stored as json with the posting lists delta encoded, the texts are not stored (the page has them already).
+    """
+
+    version = 1
+    gram_length = 3
+
+    def __init__(self, texts, postings):
+        self.texts = texts
+        self.postings = postings
+
+    @classmethod
+    def build(cls, texts):
+        """
+        Builds the index from the texts of the rows (row ids are positions in texts).
+        """
+        texts = [text.lower() for text in texts]
+        postings = {}
+        for row, text in enumerate(texts):
+            grams = {text[i:i+cls.gram_length] for i in range(len(text) - cls.gram_length + 1)}
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        return cls(texts, postings)
+
+    def to_json(self):
+        """
+        Data for a json file, with delta encoded posting lists (grams sorted, so the same index gives the same file).
+        """
+        grams = {}
+        for gram in sorted(self.postings):
+            rows = self.postings[gram]
+            grams[gram] = [rows[0]] + [b - a for a, b in zip(rows, rows[1:])]
+        return {'version': self.version, 'rows': len(self.texts), 'gram length': self.gram_length, 'grams': grams}
+
+    def lookup(self, word):
+        """
+        Sorted ids of all rows containing the word.
+        """
+        word = word.lower()
+        if len(word) < self.gram_length:
+            return [row for row, text in enumerate(self.texts) if word in text]
+        if len(word) == self.gram_length:
+            return self.postings.get(word, [])
+        grams = sorted({word[i:i+self.gram_length] for i in range(len(word) - self.gram_length + 1)}, key=lambda x: len(self.postings.get(x, ())))
+        rows = self.postings.get(grams[0], [])
+        for gram in grams[1:]:
+            rows = intersect_postings(rows, self.postings.get(gram, []))
+        return [row for row in rows if word in self.texts[row]]
 
-    return infos
\ No newline at end of file
+    def search(self, query):
+        """
+        Sorted ids of all rows containing all words (separated by spaces) of the query, like the search of the table.
+        """
+        rows = list(range(len(self.texts)))
+        for word in query.split(' '):
+            if word:
+                rows = intersect_postings(rows, self.lookup(word))
+        return rows
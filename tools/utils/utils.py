@@ -3,6 +3,10 @@ Utilities for the tools. Only depending on standard Python or third party module
 """
 
 import os
+import re
+import gzip
+import hashlib
+import pickle
 import shutil
 import subprocess
 import tarfile
@@ -39,6 +43,170 @@ def write_text(file, text):
         f.write(text)
 
 
+def write_text_atomic(file, text):
+    """
+    Writes a whole text file (UTF-8 encoded) by writing to a temporary file next to it first and then replacing the
+    file, so that the file is never seen half written.
+    """
+    temp_file = file + '.tmp'
+    write_text(temp_file, text)
+    os.replace(temp_file, file)
+
+
+def write_pickle_atomic(file, data):
+    """
+    Pickles data into a file (highest protocol), like write_text_atomic through a temporary file next to it.
+    """
+    temp_file = file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, file)
+
+
+def write_text_if_changed(file, text, ignored=None):
+    """
+    Writes a whole text file (UTF-8 encoded, atomically) only if the hash of its content changes. Matches of the
+    optional regex ignored (for example a timestamp) are not considered. Returns True if the file was written.
+    """
+    if os.path.isfile(file):
+        old_text, new_text = read_text(file), text
+        if ignored:
+            old_text, new_text = ignored.sub('', old_text), ignored.sub('', new_text)
+        if hashlib.sha1(old_text.encode('utf-8')).digest() == hashlib.sha1(new_text.encode('utf-8')).digest():
+            return False
+    write_text_atomic(file, text)
+    return True
+
+
+def write_gzip_copy(file, text, force=False):
+    """
+    Writes a gzip compressed copy of a text (UTF-8 encoded) to the file plus ".gz" (for web servers serving precompressed
+    files) if the text changed (force) or the compressed file does not exist. The copy is the same for the same text.
+    """
+    gzip_file = file + '.gz'
+    if not force and os.path.isfile(gzip_file):
+        return
+    temp_file = gzip_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(gzip.compress(text.encode('utf-8'), compresslevel=9, mtime=0))
+    os.replace(temp_file, gzip_file)
+
+
+class MultiPatternMatcher:
+    """
+    Finds all occurrences of many literal strings in a text in a single scan.
+
+    The patterns are put in a trie which is turned into a single regex (common prefixes are only matched once, like in
+    an Aho-Corasick automaton, so the scan does not get slower with more patterns). The regex is a zero-width lookahead,
+    so a match is tried at every position and overlapping occurrences are found. At each position the longest matching
+    pattern is found by the regex, patterns that are prefixes of it are added from a precomputed table.
+    """
+
+    def __init__(self, patterns):
+        patterns = set(patterns)
+        trie = {}
+        for pattern in patterns:
+            node = trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self.regex = re.compile('(?=({}))'.format(self.trie_regex(trie)))
+        self.prefixes = {x: [y for y in patterns if y != x and x.startswith(y)] for x in patterns}
+
+    @classmethod
+    def trie_regex(cls, trie):
+        """
+        Regex matching the longest pattern of a trie (nested dictionaries of characters, '' marks the end of a pattern).
+
+        The nodes are visited with an explicit stack (children before their parent), so that patterns may be longer than
+        the recursion limit.
+        """
+        regexes = {}
+        stack = [(trie, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for char, child in node.items() if char)
+                continue
+            alternatives = [re.escape(char) + regexes.pop(id(child)) for char, child in sorted(node.items()) if char]
+            if not alternatives:
+                regex = ''
+            elif len(alternatives) == 1 and '' not in node:
+                regex = alternatives[0]
+            else:
+                regex = '(?:{}){}'.format('|'.join(alternatives), '?' if '' in node else '')
+            regexes[id(node)] = regex
+        return regexes[id(trie)]
+
+    def find_all(self, text):
+        """
+        Returns (position, pattern) for every occurrence of every pattern in text, sorted by position.
+        """
+        occurrences = []
+        for match in self.regex.finditer(text):
+            position, pattern = match.start(), match.group(1)
+            occurrences.append((position, pattern))
+            occurrences.extend((position, x) for x in self.prefixes[pattern])
+        return occurrences
+
+
+class GitObjectReader:
+    """
+    Reads objects (blobs) of a git repository through a single long running "git cat-file --batch" process, without a
+    checkout and without a process per object. Objects are given by hash or as "revision:path".
+
+    Use with a with statement or call close().
+    """
+
+    def __init__(self, repository_path):
+        self.process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=repository_path, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, name):
+        """
+        Returns the content of an object as bytes or None if there is no such object.
+        """
+        stdin, stdout = self.process.stdin, self.process.stdout
+        stdin.write(name.encode('utf-8') + b'\n')
+        stdin.flush()
+        header = stdout.readline()
+        if not header:
+            raise RuntimeError('git cat-file stopped')
+        if header.endswith(b' missing\n') or header.endswith(b' ambiguous\n'):
+            return None
+        size = int(header.split()[2])
+        content = stdout.read(size)
+        stdout.read(1) # newline after the content
+        return content
+
+    def read_text(self, name):
+        """
+        Returns the content of an object as text (UTF-8 encoded) or None if there is no such object.
+        """
+        content = self.read(name)
+        return None if content is None else content.decode('utf-8', errors='ignore')
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def git_output(repository_path, *args):
+    """
+    Runs a git command in a repository and returns its standard output as text (UTF-8).
+    """
+    result = subprocess.run(['git', *args], cwd=repository_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode:
+        raise RuntimeError('error {} in git {}: {}'.format(result.returncode, ' '.join(args), result.stderr.decode('utf-8', errors='ignore')))
+    return result.stdout.decode('utf-8', errors='ignore')
+
+
 def determine_archive_version_generic(name, leading_terms, trailing_terms):
     """
     Given an archive file name, tries to get version information. Generic version that can cut off leading and trailing
@@ -147,17 +315,19 @@ def determine_latest_last_modified_date(folder):
     return latest_last_modified
 
 
-def subprocess_run(cmd, display=True):
+def subprocess_run(cmd, display=True, cwd=None):
     """
-    Runs a cmd via subprocess and displays the std output in case of success or the std error output in case of failure
-    where it also stops execution.
+    Runs a cmd via subprocess (in the folder cwd if given) and displays the std output in case of success or the std
+    error output in case of failure where it also stops execution. Without display nothing is printed and the error
+    output is only part of the raised error (for callers running several commands at the same time).
     """
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
     if result.returncode:
-        print("error {} in call {}".format(result.returncode, cmd))
-        print(result.stdout.decode('cp1252'))
-        print(result.stderr.decode('cp1252'))
-        raise RuntimeError()
+        if display:
+            print("error {} in call {}".format(result.returncode, cmd))
+            print(result.stdout.decode('cp1252'))
+            print(result.stderr.decode('cp1252'))
+        raise RuntimeError('error {} in call {}: {}'.format(result.returncode, cmd, result.stderr.decode('cp1252', errors='replace').strip()))
     if display:
         print('  output: {}'.format(result.stdout.decode('cp1252')))
     return result.stdout.decode('cp1252')